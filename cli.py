@@ -0,0 +1,163 @@
+"""Headless entry point: drives VideoDownloader and MediaProcessor without the GUI.
+
+Progress is written to stdout as one JSON object per line; everything the
+modules print goes to stderr so stdout stays machine-readable.
+
+    python cli.py download [--audio] [--process | --stream] URL... (or -i urls.txt, or stdin)
+    python cli.py process [--audio] [--workers N] FILE... (or -i files.txt, or stdin)
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from contextlib import redirect_stdout
+from typing import List
+from progress_bus import ProgressBus, ProgressEvent
+import tracing
+
+
+class JsonProgress:
+    """ProgressBus subscriber that writes every event as a JSON line; safe to call from worker threads"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def emit(self, event: str, stage: str, **fields):
+        record = {'event': event, 'stage': stage, 'time': round(time.time(), 3), **fields}
+        with self._lock:
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.stream.flush()
+
+    def __call__(self, event: ProgressEvent):
+        self.emit('progress', event.stage, message=event.message, percent=round(event.percent, 1),
+                  **({'job': event.job_id} if event.job_id else {}))
+
+
+def read_items(args) -> List[str]:
+    if args.items:
+        lines = args.items
+    elif args.input and args.input != '-':
+        with open(args.input, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    else:
+        lines = sys.stdin.read().splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith('#')]
+
+
+def run_download(args, bus: ProgressBus, progress: JsonProgress) -> int:
+    from downloader import VideoDownloader
+    from processor import MediaProcessor
+
+    urls = read_items(args)
+    if not urls:
+        print("No URLs given", file=sys.stderr)
+        return 2
+
+    downloader = VideoDownloader(bus.callback('download'), args.output, max_concurrent=args.jobs)
+    processor = MediaProcessor(bus.callback('process'), args.output, parallel_encode=args.parallel_encode)
+
+    if args.sections:
+        parts = [int(p) for p in args.sections.split(',')] if args.sections != 'all' else None
+        outputs = []
+        for url in urls:
+            outputs.extend(downloader.download_sections(url, args.audio, parts))
+        progress.emit('result', 'download', outputs=outputs)
+        return 0 if outputs else 1
+
+    if args.stream:
+        from streaming import stream_split
+        outputs = stream_split(downloader, processor, urls, args.audio)
+        progress.emit('result', 'download', outputs=outputs)
+        return 0 if outputs else 1
+
+    if not args.process:
+        jobs = downloader.download_videos(urls, args.audio)
+        failed = downloader.total_files - len(jobs)
+        progress.emit('result', 'download', outputs=[job.file_path for job in jobs], failed=failed)
+        return 0 if failed == 0 else 1
+
+    # Pipeline: download, probe, split and cleanup stages run at once, each behind a bounded queue
+    from pipeline import run_media_pipeline
+    outputs = []
+    completed = [0]
+
+    def finished(item):
+        # Reported as each URL completes rather than kept, so a whole channel runs in flat memory
+        outputs.extend(item.outputs)
+        completed[0] += 1
+        progress.emit('item', 'pipeline', url=item.url, outputs=item.outputs)
+
+    run_media_pipeline(downloader, processor, urls, args.audio, split_workers=args.workers, on_result=finished,
+                       on_metrics=lambda stages: progress.emit('metrics', 'pipeline', stages=stages))
+    failed = downloader.total_files - completed[0]
+    progress.emit('result', 'download', outputs=outputs, failed=failed)
+    return 0 if failed == 0 else 1
+
+
+def run_process(args, bus: ProgressBus, progress: JsonProgress) -> int:
+    from processor import MediaProcessor
+
+    files = read_items(args)
+    if not files:
+        print("No files given", file=sys.stderr)
+        return 2
+
+    processor = MediaProcessor(bus.callback('process'), args.output, parallel_encode=args.parallel_encode)
+    outputs = processor.process_files(files, args.audio, delete_originals=args.delete_originals,
+                                      max_workers=args.workers)
+    progress.emit('result', 'process', outputs=outputs)
+    return 0 if outputs else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('-o', '--output', default=os.getcwd(), help="output folder (default: current directory)")
+    common.add_argument('--audio', action='store_true', help="MP3 output instead of MP4")
+    common.add_argument('--workers', type=int, default=1, help="inputs processed at the same time")
+    common.add_argument('--parallel-encode', action='store_true', help="encode MP3 parts of one input in parallel")
+    common.add_argument('--trace', metavar='FILE', help="write a Chrome trace of every stage (open in Perfetto)")
+
+    parser = argparse.ArgumentParser(prog="split45", description="Download and split media into 45-minute parts")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    download = commands.add_parser('download', parents=[common], help="download URLs (optionally processing them)")
+    download.add_argument('items', nargs='*', metavar='URL')
+    download.add_argument('-i', '--input', help="file with one URL per line ('-' for stdin)")
+    download.add_argument('-j', '--jobs', type=int, default=3, help="concurrent downloads")
+    mode = download.add_mutually_exclusive_group()
+    mode.add_argument('--process', action='store_true', help="split each file as soon as it is downloaded")
+    mode.add_argument('--stream', action='store_true', help="split while downloading, keeping no original")
+    mode.add_argument('--sections', metavar='PARTS', help="download parts directly: 'all' or e.g. 1,3")
+    download.set_defaults(handler=run_download)
+
+    process = commands.add_parser('process', parents=[common], help="split local files")
+    process.add_argument('items', nargs='*', metavar='FILE')
+    process.add_argument('-i', '--input', help="file with one path per line ('-' for stdin)")
+    process.add_argument('--delete-originals', action='store_true', help="remove inputs after a successful split")
+    process.set_defaults(handler=run_process)
+
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+    bus = ProgressBus()
+    progress = JsonProgress(sys.stdout)
+    bus.subscribe(progress)
+    with redirect_stdout(sys.stderr):
+        if not args.trace:
+            tracing.enable_from_env()
+            return args.handler(args, bus, progress)
+
+        tracer = tracing.enable()
+        try:
+            return args.handler(args, bus, progress)
+        finally:
+            tracer.write(args.trace)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,59 +1,74 @@
-import yt_dlp
 import os
-import ssl
-import urllib3
-import sys
-from typing import Callable, List, Dict
+import copy
+import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Callable, List, Dict, Iterable, Iterator, Optional, Tuple
+from rate_limiter import AdaptiveRateLimiter, throttle_status
+from media_job import MediaJob
+from keyframes import plan_cuts
+from processor import MediaProcessor
+from toolchain import get_toolchain
+from journal import download_key, get_journal, process_key
+from throughput import ThroughputModel, get_throughput_model
+from storage import Reservation, expected_size, get_storage_budget
+from playlist import PlaylistExpander, is_collection_extractor
+import tracing
 
-# Disable SSL warnings and verification globally
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-ssl._create_default_https_context = ssl._create_unverified_context
+_yt_dlp = None
+_yt_dlp_lock = threading.Lock()
+
+
+def load_yt_dlp():
+    """Import yt-dlp on first use; it loads every extractor, which would dominate startup time"""
+    global _yt_dlp
+    with _yt_dlp_lock:
+        if _yt_dlp is None:
+            import ssl
+            import urllib3
+
+            # Disable SSL warnings and verification globally
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+            ssl._create_default_https_context = ssl._create_unverified_context
+
+            import yt_dlp
+            _yt_dlp = yt_dlp
+    return _yt_dlp
 
 class VideoDownloader:
-    def __init__(self, progress_callback: Callable[[str, float], None] = None, output_folder: str = None):
+    MAX_ATTEMPTS = 4
+    STREAM_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, progress_callback: Callable[[str, float], None] = None, output_folder: str = None,
+                 max_concurrent: int = 3, rate_limiter: AdaptiveRateLimiter = None,
+                 throughput: ThroughputModel = None):
         self.progress_callback = progress_callback
         self.output_folder = output_folder or os.getcwd()
         self.downloads_folder = os.path.join(self.output_folder, "downloads")
+        self.min45_folder = os.path.join(self.output_folder, "45min")
+        self.remainder_folder = os.path.join(self.output_folder, "remainder")
+        self.max_concurrent = max_concurrent
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        self.journal = get_journal(self.output_folder)
+        self.throughput = throughput or get_throughput_model()
+        self.storage = get_storage_budget(self.output_folder)
         
-        self.ffmpeg_path = self._find_ffmpeg()
-        self.ffprobe_path = self._find_ffprobe()
+        self.toolchain = get_toolchain()
+        self.ffmpeg_path = self.toolchain.ffmpeg_path
+        self.ffprobe_path = self.toolchain.ffprobe_path
         
         self.current_file_index = 0
         self.total_files = 0
         self.current_audio_only = False
-
-    def _find_ffmpeg(self):
-        """Find FFmpeg executable - bundled or system"""
-        if getattr(sys, 'frozen', False):
-            base_path = sys._MEIPASS
-            ffmpeg_path = os.path.join(base_path, 'ffmpeg', 'ffmpeg.exe')
-            if os.path.exists(ffmpeg_path):
-                return ffmpeg_path
-        else:
-            local_ffmpeg = os.path.join(os.path.dirname(__file__), 'ffmpeg', 'ffmpeg.exe')
-            if os.path.exists(local_ffmpeg):
-                return local_ffmpeg
-        
-        return 'ffmpeg'
-
-    def _find_ffprobe(self):
-        """Find FFprobe executable - bundled or system"""
-        if getattr(sys, 'frozen', False):
-            base_path = sys._MEIPASS
-            ffprobe_path = os.path.join(base_path, 'ffmpeg', 'ffprobe.exe')
-            if os.path.exists(ffprobe_path):
-                return ffprobe_path
-        else:
-            local_ffprobe = os.path.join(os.path.dirname(__file__), 'ffmpeg', 'ffprobe.exe')
-            if os.path.exists(local_ffprobe):
-                return local_ffprobe
-        
-        return 'ffprobe'
+        self._flat_ydl = None
 
     def _get_output_template(self, audio_only: bool) -> str:
-        return os.path.join(self.downloads_folder, "%(title)s.%(ext)s")
+        # The id keeps same-titled videos, common across a channel, from downloading into one file
+        # at once; the parts take their names from this file, so they stay apart too
+        return os.path.join(self.downloads_folder, "%(title)s [%(id)s].%(ext)s")
 
-    def _progress_hook(self, d: Dict):
+    def _progress_hook(self, d: Dict, file_index: int = None, converting: bool = False):
+        file_index = file_index or self.current_file_index
         if d['status'] == 'downloading':
             if 'total_bytes' in d and 'downloaded_bytes' in d:
                 progress = (d['downloaded_bytes'] / d['total_bytes']) * 100
@@ -65,59 +80,56 @@ class VideoDownloader:
             if self.progress_callback:
                 media_type = "audio" if self.current_audio_only else "video"
                 filename = os.path.basename(d.get('filename', 'Unknown'))
-                status_msg = f"Downloading {media_type} {self.current_file_index}/{self.total_files}: {filename}"
-                self.progress_callback(status_msg, progress)
+                status_msg = f"Downloading {media_type} {file_index}/{self.total_files}: {filename}"
+                self._report(file_index, status_msg, progress)
                 
         elif d['status'] == 'finished':
             if self.progress_callback:
                 media_type = "audio" if self.current_audio_only else "video"
                 filename = os.path.basename(d.get('filename', 'Unknown'))
                 
-                if self.current_audio_only and not filename.endswith('.mp3'):
-                    status_msg = f"Converting to MP3 {self.current_file_index}/{self.total_files}: {filename}"
-                    self.progress_callback(status_msg, 95)
+                if converting and not filename.endswith('.mp3'):
+                    status_msg = f"Converting to MP3 {file_index}/{self.total_files}: {filename}"
+                    self._report(file_index, status_msg, 95)
                 else:
-                    status_msg = f"Completed {media_type} {self.current_file_index}/{self.total_files}: {filename}"
-                    self.progress_callback(status_msg, 100)
+                    status_msg = f"Completed {media_type} {file_index}/{self.total_files}: {filename}"
+                    self._report(file_index, status_msg, 100)
                     
         elif d['status'] == 'error':
             if self.progress_callback:
                 filename = os.path.basename(d.get('filename', 'Unknown'))
-                status_msg = f"Error downloading {self.current_file_index}/{self.total_files}: {filename}"
-                self.progress_callback(status_msg, -1)
+                status_msg = f"Error downloading {file_index}/{self.total_files}: {filename}"
+                self._report(file_index, status_msg, -1)
 
-    def download_videos(self, urls: List[str], audio_only: bool = False) -> List[str]:
-        if not os.path.exists(self.downloads_folder):
-            os.makedirs(self.downloads_folder)
-            print(f"Created downloads folder: {self.downloads_folder}")
+    def _report(self, file_index: Optional[int], message: str, progress: float):
+        """Progress of one file, published under its own job id when the callback can do that (ProgressBus)"""
+        callback = self.progress_callback
+        for_job = getattr(callback, 'for_job', None)
+        if for_job and file_index:
+            callback = for_job(str(file_index))
+        callback(message, progress)
 
-        downloaded_files = []
-        self.total_files = len(urls)
-        self.current_audio_only = audio_only
-        successful_downloads = 0
-        
-        print(f"Using FFmpeg: {self.ffmpeg_path}")
-        print(f"Using FFprobe: {self.ffprobe_path}")
-        
-        media_type = "audio files" if audio_only else "videos"
-        if self.progress_callback:
-            self.progress_callback(f"Starting download of {len(urls)} {media_type}...", 0)
-        
-        ydl_opts = {
+    def _build_ydl_opts(self, audio_only: bool, file_index: int, extract_mp3: bool = False) -> Dict:
+        """yt-dlp options; extract_mp3 converts audio downloads to MP3 when no MediaProcessor step follows"""
+        return {
             'format': 'bestaudio/best' if audio_only else 'worst/best',
             'outtmpl': self._get_output_template(audio_only),
-            'progress_hooks': [self._progress_hook],
+            'progress_hooks': [lambda d: self._progress_hook(d, file_index, converting=extract_mp3)],
+            # When the file is going to be split, audio is kept in its native codec (opus/m4a) and
+            # MediaProcessor encodes the MP3 parts straight from it, so the full track is never
+            # encoded to MP3 and then re-encoded. Download-only runs still get MP3 files.
             'postprocessors': [{
                 'key': 'FFmpegExtractAudio',
                 'preferredcodec': 'mp3',
-            }] if audio_only else [],
+            }] if audio_only and extract_mp3 else [],
             'merge_output_format': 'mp4' if not audio_only else None,
             'quiet': False,
             'no_warnings': False,
             'ffmpeg_location': os.path.dirname(self.ffmpeg_path) if os.path.dirname(self.ffmpeg_path) else None,
             'nocheckcertificate': True,
             'prefer_insecure': True,
-            'ignoreerrors': True,
+            # Errors are raised so throttling (HTTP 429/403) can be told apart and fed to the rate limiter
+            'ignoreerrors': False,
             'socket_timeout': 60,
             'retries': 3,
             'no_color': True,
@@ -128,51 +140,472 @@ class VideoDownloader:
             'prefer_free_formats': True,
         }
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            for idx, url in enumerate(urls):
-                self.current_file_index = idx + 1
+    def _add_trace_hooks(self, opts: Dict, url: str) -> Dict:
+        """Split one yt-dlp call into extract, network and postprocessor spans using its hooks"""
+        marks = {'start': tracing.now()}
+
+        def on_progress(d: Dict):
+            if d['status'] == 'downloading' and 'network' not in marks:
+                marks['network'] = tracing.now()
+                if 'extracted' not in marks:
+                    marks['extracted'] = True
+                    tracing.complete('extract', marks['start'], marks['network'], url=url)
+            elif d['status'] == 'finished' and 'network' in marks:
+                tracing.complete('network', marks.pop('network'), tracing.now(),
+                                 bytes=d.get('total_bytes') or d.get('downloaded_bytes') or 0,
+                                 filename=os.path.basename(d.get('filename', '')))
+
+        def on_postprocess(d: Dict):
+            name = d.get('postprocessor', 'postprocessor')
+            if d['status'] == 'started':
+                marks[name] = tracing.now()
+            elif d['status'] == 'finished' and name in marks:
+                tracing.complete(f"postprocess:{name}", marks.pop(name), tracing.now())
+
+        opts['progress_hooks'] = [*opts.get('progress_hooks', []), on_progress]
+        opts['postprocessor_hooks'] = [*opts.get('postprocessor_hooks', []), on_postprocess]
+        return opts
+
+    def is_collection(self, url: str) -> bool:
+        """Whether url is handled by a playlist/channel extractor, so single videos are not extracted twice"""
+        for extractor in load_yt_dlp().extractor.gen_extractor_classes():
+            if extractor.ie_key() != 'Generic' and extractor.suitable(url):
+                return is_collection_extractor(extractor.IE_NAME)
+        return False
+
+    def extract_flat(self, url: str) -> Optional[Dict]:
+        """A playlist or channel's entries as bare URLs, read page by page as they are iterated.
+
+        With process=False yt-dlp hands back the extractor's own entries
+        generator, so the next page is only fetched once the entries before
+        it have been consumed.
+        """
+        if self._flat_ydl is None:
+            opts = self._build_ydl_opts(False, 0)
+            opts.update({'extract_flat': 'in_playlist', 'progress_hooks': [], 'quiet': True})
+            self._flat_ydl = load_yt_dlp().YoutubeDL(opts)
+        self.rate_limiter.acquire()
+        return self._flat_ydl.extract_info(url, download=False, process=False)
+
+    def expand_urls(self, urls: Iterable[str], expand: bool = True) -> Iterator[str]:
+        """Video URLs from urls, with playlists and channels expanded lazily and counted into total_files"""
+        if expand:
+            urls = PlaylistExpander(self.extract_flat, self.is_collection).expand(urls)
+        for url in urls:
+            self.total_files += 1
+            yield url
+
+    def _journaled_download(self, url: str, audio_only: bool, for_processing: bool = False) -> Optional[MediaJob]:
+        """A download an earlier run finished that still serves this one.
+
+        For processing, the file must still be there or all of its parts must
+        be. A download-only run hands the file itself back, so it must exist
+        and, for audio, already be the MP3 that mode promises rather than the
+        native file a processing run kept.
+        """
+        state = self.journal.state(download_key(url, audio_only))
+        if state is None or state.downloaded is None:
+            return None
+        job = MediaJob(**state.downloaded)
+        if not for_processing:
+            if not os.path.exists(job.file_path) or (audio_only and not job.file_path.lower().endswith('.mp3')):
+                return None
+            return job
+        if os.path.exists(job.file_path):
+            return job
+        # The original is gone, so the recorded parts are all that is left of it
+        processed = self.journal.state(process_key(job.file_path, audio_only))
+        if processed and processed.done and processed.outputs \
+                and all(os.path.exists(path) for path in processed.outputs):
+            return job
+        return None
+
+    def _admit(self, info: Dict, file_index: int, wait: bool, with_parts: bool) -> Optional[Reservation]:
+        """Reserve disk space for the format yt-dlp picked, pausing while running jobs still hold too much"""
+        expected = expected_size(info)
+        if expected <= 0:
+            # No size or bitrate in the metadata: fall back to the learned bytes per second of media
+            rate = self.throughput.rates['audio_bytes_per_media_s' if self.current_audio_only
+                                        else 'video_bytes_per_media_s']
+            expected = int((info.get('duration') or self.throughput.rates['media_seconds_per_item']) * rate)
+        tracing.annotate(expected_bytes=expected)
+
+        def on_wait(needed: int, available: int):
+            if self.progress_callback:
+                self._report(file_index, f"⏸ Low disk space, waiting to download {file_index}/{self.total_files} "
+                             f"({needed / 1e9:.1f} GB needed, {available / 1e9:.1f} GB free)", 0)
+
+        return self.storage.admit(expected, info.get('title') or info.get('id') or "download", wait, on_wait,
+                                  with_parts=with_parts)
+
+    @tracing.traced("download")
+    def _download_one(self, url: str, file_index: int, audio_only: bool, for_processing: bool = False,
+                      wait_for_space: bool = None) -> Optional[MediaJob]:
+        """Download one url; for_processing means MediaProcessor takes the file next.
+
+        Only then is disk space held for its parts after the download, since
+        only MediaProcessor releases it. wait_for_space (default: for_processing)
+        pauses a download that does not fit instead of failing it.
+        """
+        if wait_for_space is None:
+            wait_for_space = for_processing
+        total = self.total_files
+        job = self._journaled_download(url, audio_only, for_processing)
+        if job:
+            print(f"Already downloaded {file_index}/{total}: {job.file_path}")
+            if self.progress_callback:
+                self._report(file_index, f"✅ Already downloaded {file_index}/{total}", 100)
+            return job
+
+        tracing.annotate(url=url, audio_only=audio_only)
+        reservation = None
+        try:
+            for attempt in range(1, self.MAX_ATTEMPTS + 1):
+                waited = self.rate_limiter.acquire()
+                if waited > 0:
+                    print(f"Rate limiter: waited {waited:.1f}s before download {file_index}/{total}")
+                    tracing.annotate(rate_limited_s=waited)
+
                 try:
-                    print(f"\nDownloading {idx + 1}/{len(urls)}: {url}")
+                    print(f"\nDownloading {file_index}/{total}: {url}")
                     print(f"Format: {'Audio only' if audio_only else 'Video (low quality)'}")
                     print(f"Output folder: {self.downloads_folder}")
-                    
-                    info = ydl.extract_info(url, download=True)
-                    
-                    if info is None:
-                        print(f"Could not download {url}")
-                        if self.progress_callback:
-                            self.progress_callback(f"Failed to download {idx + 1}/{len(urls)}", -1)
-                        continue
 
-                    filename = ydl.prepare_filename(info)
-                    if audio_only:
+                    opts = self._build_ydl_opts(audio_only, file_index, extract_mp3=not for_processing)
+                    if tracing.enabled():
+                        opts = self._add_trace_hooks(opts, url)
+                    with load_yt_dlp().YoutubeDL(opts) as ydl:
+                        # Extract first so the chosen format's size can be checked against free space
+                        info = ydl.extract_info(url, download=False)
+                        if info is not None and reservation is None:
+                            reservation = self._admit(info, file_index, wait_for_space, for_processing)
+                            if reservation is None:
+                                if self.progress_callback:
+                                    self._report(file_index, f"❌ Not enough disk space for {file_index}/{total}", -1)
+                                return None
+                        # Timed from here, so a wait for disk space is not taken for a slow connection
+                        started = time.time()
+                        if info is not None:
+                            info = ydl.process_ie_result(info, download=True)
+
+                        if info is None:
+                            print(f"Could not download {url}")
+                            if self.progress_callback:
+                                self._report(file_index, f"Failed to download {file_index}/{total}", -1)
+                            return None
+
+                        filename = ydl.prepare_filename(info)
+
+                    self.rate_limiter.record_success()
+                    if audio_only and not for_processing:
                         filename = filename.rsplit(".", 1)[0] + ".mp3"
 
                     if os.path.exists(filename):
-                        downloaded_files.append(filename)
-                        successful_downloads += 1
                         print(f"Successfully downloaded: {filename}")
-                        
                         if self.progress_callback:
                             media_type = "audio" if audio_only else "video"
-                            self.progress_callback(f"✅ Completed {media_type} {idx + 1}/{len(urls)}", 100)
-                    else:
-                        print(f"File not found after download: {filename}")
-                        if self.progress_callback:
-                            self.progress_callback(f"❌ Failed {idx + 1}/{len(urls)}", -1)
+                            self._report(file_index, f"✅ Completed {media_type} {file_index}/{total}", 100)
+                        job = MediaJob.from_info(info, filename, url, audio_only)
+                        self.throughput.record_download(os.path.getsize(filename), time.time() - started,
+                                                        job.duration, audio_only)
+                        tracing.annotate(attempts=attempt, bytes=os.path.getsize(filename), path=filename)
+                        self.journal.record(download_key(url, audio_only), 'downloaded', job_record=job._asdict())
+                        if for_processing:
+                            # The original now shows up in free space; keep holding room for its parts
+                            # until MediaProcessor has written them and released the file
+                            reservation.downloaded(filename)
+                            reservation = None
+                        return job
+
+                    print(f"File not found after download: {filename}")
+                    if self.progress_callback:
+                        self._report(file_index, f"❌ Failed {file_index}/{total}", -1)
+                    return None
 
                 except Exception as e:
+                    status = throttle_status(e)
+                    if status and attempt < self.MAX_ATTEMPTS:
+                        self.rate_limiter.record_throttle()
+                        print(f"Throttled (HTTP {status}) on {url}, backing off to {self.rate_limiter.interval:.1f}s "
+                              f"(attempt {attempt}/{self.MAX_ATTEMPTS})")
+                        if self.progress_callback:
+                            self._report(file_index, f"⏳ Throttled, retrying {file_index}/{total}...", 0)
+                        continue
+
                     print(f"Error downloading {url}: {str(e)}")
                     if self.progress_callback:
-                        self.progress_callback(f"❌ Error {idx + 1}/{len(urls)}: {str(e)}", -1)
+                        self._report(file_index, f"❌ Error {file_index}/{total}: {str(e)}", -1)
+                    return None
+
+            return None
+        finally:
+            if reservation is not None:
+                reservation.release()
+
+    def _iter_stream(self, response, total_bytes: int, file_index: int, filename: str) -> Iterator[bytes]:
+        downloaded = 0
+        try:
+            while True:
+                chunk = response.read(self.STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                downloaded += len(chunk)
+                self._progress_hook({'status': 'downloading', 'downloaded_bytes': downloaded,
+                                     'total_bytes': total_bytes or downloaded, 'filename': filename}, file_index)
+                yield chunk
+            self._progress_hook({'status': 'finished', 'filename': filename}, file_index)
+        finally:
+            response.close()
+
+    def open_stream(self, url: str, audio_only: bool = False,
+                    file_index: int = 1) -> Optional[Tuple[MediaJob, Iterator[bytes]]]:
+        """Resolve url to a single progressive format and return its metadata and an iterator over its bytes.
+
+        Nothing is written to downloads/; the caller feeds the chunks straight into
+        MediaProcessor.process_stream. The job's file_path is the name the file
+        would have had, used only to derive part names.
+        """
+        import urllib.request
+
+        self.current_audio_only = audio_only
+        self.total_files = self.total_files or 1
+        opts = self._build_ydl_opts(audio_only, file_index)
+        # Streaming needs one muxed file, not separate video and audio formats merged afterwards
+        opts['format'] = 'bestaudio/best' if audio_only else 'worst[vcodec!=none][acodec!=none]/worst'
+        opts['postprocessors'] = []
+
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            self.rate_limiter.acquire()
+            try:
+                print(f"\nStreaming {file_index}/{self.total_files}: {url}")
+                with load_yt_dlp().YoutubeDL(opts) as ydl:
+                    info = ydl.extract_info(url, download=False)
+                    if info is None or not info.get('url'):
+                        print(f"No single streamable format for {url}")
+                        return None
+                    filename = ydl.prepare_filename(info)
+
+                headers = info.get('http_headers') or opts['http_headers']
+                response = urllib.request.urlopen(urllib.request.Request(info['url'], headers=headers),
+                                                  timeout=opts['socket_timeout'])
+                self.rate_limiter.record_success()
+
+                job = MediaJob.from_info(info, filename, url)
+                total_bytes = int(response.headers.get('Content-Length') or job.filesize or 0)
+                return job, self._iter_stream(response, total_bytes, file_index, filename)
+
+            except Exception as e:
+                status = throttle_status(e)
+                if status and attempt < self.MAX_ATTEMPTS:
+                    self.rate_limiter.record_throttle()
+                    print(f"Throttled (HTTP {status}) on {url}, backing off to {self.rate_limiter.interval:.1f}s")
+                    continue
+
+                print(f"Error opening stream {url}: {str(e)}")
+                if self.progress_callback:
+                    self._report(file_index, f"❌ Error {file_index}/{self.total_files}: {str(e)}", -1)
+                return None
+
+        return None
+
+    def download_one(self, url: str, file_index: int = 1, audio_only: bool = False,
+                     for_processing: bool = True) -> Optional[MediaJob]:
+        """Download a single url for a caller that schedules downloads itself (see pipeline.py)"""
+        os.makedirs(self.downloads_folder, exist_ok=True)
+        self.current_audio_only = audio_only
+        return self._download_one(url, file_index, audio_only, for_processing)
+
+    @tracing.traced("download_videos")
+    def download_videos(self, urls: Iterable[str], audio_only: bool = False, max_concurrent: int = None,
+                        on_downloaded: Callable[[int, MediaJob], None] = None,
+                        expand: bool = True, process: bool = None) -> List[MediaJob]:
+        """Download urls, up to max_concurrent at a time, returning one MediaJob per file in url order.
+
+        urls may be any iterable, read only as fast as downloads start, and
+        playlist or channel URLs among them are expanded lazily into their
+        videos unless expand is off. Each job carries the duration, codecs,
+        container and size yt-dlp already extracted, so MediaProcessor can plan
+        the split without probing. on_downloaded(index, job) is called as soon
+        as each download lands, which lets pipeline mode start processing
+        before the batch finishes.
+
+        process says MediaProcessor will split the files (by default, when
+        on_downloaded is set): MP3 downloads then stay in their native codec
+        for the processor to encode once, instead of being converted here.
+
+        Each download is first admitted against free space on the output
+        volume. In pipeline mode a download that does not fit waits for
+        earlier jobs to be split and their originals deleted; otherwise it
+        fails straight away, since nothing would free the space. Without
+        process no space is held once a download has landed.
+        """
+        if not os.path.exists(self.downloads_folder):
+            os.makedirs(self.downloads_folder)
+            print(f"Created downloads folder: {self.downloads_folder}")
+
+        if process is None:
+            process = on_downloaded is not None
+        self.total_files = 0
+        self.current_audio_only = audio_only
+        workers = max(1, max_concurrent or self.max_concurrent)
+        results = {}
+        
+        print(f"Using FFmpeg: {self.ffmpeg_path}")
+        print(f"Using FFprobe: {self.ffprobe_path}")
+        
+        media_type = "audio files" if audio_only else "videos"
+        if self.progress_callback:
+            self.progress_callback(f"Starting download of {media_type}...", 0)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = {}
+
+            def collect(finished):
+                for future in finished:
+                    idx = pending.pop(future)
+                    results[idx] = future.result()
+                    if results[idx] and on_downloaded:
+                        on_downloaded(idx, results[idx])
+
+            # Only a couple of downloads per worker are queued ahead, so a channel
+            # with thousands of videos is never held in memory all at once
+            for idx, url in enumerate(self.expand_urls(urls, expand)):
+                if len(pending) >= 2 * workers:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(finished)
+                pending[executor.submit(self._download_one, url, idx + 1, audio_only, process,
+                                        on_downloaded is not None)] = idx
+            collect(as_completed(list(pending)))
+
+        downloaded_files = [results[idx] for idx in sorted(results) if results[idx]]
+        successful_downloads = len(downloaded_files)
 
         if self.progress_callback:
             media_type = "audio files" if audio_only else "videos"
-            if successful_downloads == len(urls):
+            if results and successful_downloads == len(results):
                 self.progress_callback(f"🎉 All {successful_downloads} {media_type} downloaded successfully!", 100)
             elif successful_downloads > 0:
-                self.progress_callback(f"✅ Downloaded {successful_downloads}/{len(urls)} {media_type}", 100)
+                self.progress_callback(f"✅ Downloaded {successful_downloads}/{len(results)} {media_type}", 100)
             else:
                 self.progress_callback(f"❌ No {media_type} downloaded", -1)
 
-        return downloaded_files 
\ No newline at end of file
+        return downloaded_files
+
+    def _download_section(self, info: Dict, start: float, end: float, outtmpl: str, audio_only: bool,
+                          part: int, total: int) -> Optional[str]:
+        """Download one time range of a video download_sections already extracted, without extracting it again"""
+        url = info.get('webpage_url') or info.get('original_url') or info.get('id')
+        opts = self._build_ydl_opts(audio_only, part)
+        opts['outtmpl'] = outtmpl
+        opts['download_ranges'] = load_yt_dlp().utils.download_range_func(None, [(start, end)])
+        # Cut exactly at the part boundaries instead of at the nearest keyframes, so neighbouring parts
+        # neither overlap nor leave a gap
+        opts['force_keyframes_at_cuts'] = True
+        if audio_only:
+            # A section is a finished part, so this is its only encode
+            opts['postprocessors'] = [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'mp3', 'preferredquality': '128'}]
+            opts['progress_hooks'] = [lambda d: self._progress_hook(d, part, converting=True)]
+        else:
+            # Parts are .mp4 like the ones MediaProcessor writes, whatever container the format came in
+            opts['postprocessors'] = [{'key': 'FFmpegVideoRemuxer', 'preferedformat': 'mp4'}]
+
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            self.rate_limiter.acquire()
+            try:
+                print(f"Downloading part {part}/{total} ({start/60:.1f}-{end/60:.1f} min): {url}")
+                with load_yt_dlp().YoutubeDL(opts) as ydl:
+                    # Each worker gets its own copy: yt-dlp writes this part's range and files into it
+                    result = ydl.process_ie_result(copy.deepcopy(info), download=True)
+                    if result is None:
+                        return None
+                    filename = ydl.prepare_filename(result)
+                self.rate_limiter.record_success()
+
+                filename = filename.rsplit(".", 1)[0] + (".mp3" if audio_only else ".mp4")
+                if os.path.exists(filename):
+                    if self.progress_callback:
+                        self._report(part, f"✅ Completed part {part}/{total}", 100)
+                    return filename
+
+                print(f"File not found after download: {filename}")
+                return None
+
+            except Exception as e:
+                status = throttle_status(e)
+                if status and attempt < self.MAX_ATTEMPTS:
+                    self.rate_limiter.record_throttle()
+                    print(f"Throttled (HTTP {status}) on part {part}, backing off to {self.rate_limiter.interval:.1f}s")
+                    continue
+
+                print(f"Error downloading part {part} of {url}: {str(e)}")
+                if self.progress_callback:
+                    self._report(part, f"❌ Error part {part}/{total}: {str(e)}", -1)
+                return None
+
+        return None
+
+    def download_sections(self, url: str, audio_only: bool = False, parts: List[int] = None,
+                          max_concurrent: int = None) -> List[str]:
+        """Fetch 45-minute parts of one video directly as separate files, several at once.
+
+        parts selects 1-based part numbers (all parts when None). Files land in
+        45min/ and remainder/ with the same _partN names MediaProcessor writes,
+        so nothing is downloaded that is not kept. The video is extracted once;
+        every part downloads its range from that same info instead of asking
+        the site again.
+        """
+        os.makedirs(self.min45_folder, exist_ok=True)
+        os.makedirs(self.remainder_folder, exist_ok=True)
+        self.current_audio_only = audio_only
+
+        try:
+            with load_yt_dlp().YoutubeDL(self._build_ydl_opts(audio_only, 1)) as ydl:
+                info = ydl.extract_info(url, download=False)
+                if info is None:
+                    print(f"Could not read {url}")
+                    return []
+                base_name = os.path.splitext(os.path.basename(ydl.prepare_filename(info)))[0]
+        except Exception as e:
+            print(f"Error reading {url}: {str(e)}")
+            if self.progress_callback:
+                self.progress_callback(f"❌ Error: {str(e)}", -1)
+            return []
+
+        duration = float(info.get('duration') or 0)
+        if duration <= 0:
+            print(f"Unknown duration for {url}, cannot download by sections")
+            return []
+
+        segment_length = MediaProcessor.SEGMENT_LENGTH
+        planned = plan_cuts(None, duration, segment_length, 0)
+        selected = [i for i in range(len(planned)) if parts is None or (i + 1) in parts]
+        self.total_files = len(planned)
+
+        if self.progress_callback:
+            self.progress_callback(f"Downloading {len(selected)} of {len(planned)} parts...", 0)
+
+        def outtmpl(i: int) -> str:
+            part = planned[i]
+            is_full = i < len(planned) - 1 or (part.end - part.start) >= segment_length - 1
+            folder = self.min45_folder if is_full else self.remainder_folder
+            return os.path.join(folder, f"{base_name}_part{i + 1}.%(ext)s")
+
+        results = {}
+        workers = max(1, min(max_concurrent or self.max_concurrent, len(selected) or 1))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self._download_section, info, planned[i].start, planned[i].end, outtmpl(i),
+                                audio_only, i + 1, len(planned)): i
+                for i in selected
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+
+        part_files = [results[i] for i in selected if results.get(i)]
+        if self.progress_callback:
+            if len(part_files) == len(selected):
+                self.progress_callback(f"🎉 All {len(part_files)} parts downloaded!", 100)
+            else:
+                self.progress_callback(f"Downloaded {len(part_files)}/{len(selected)} parts", 100 if part_files else -1)
+
+        return part_files
@@ -0,0 +1,82 @@
+import threading
+import subprocess
+from collections import deque
+from typing import Callable, List, NamedTuple, Optional
+from toolchain import subprocess_kwargs
+
+
+class FFmpegProgress(NamedTuple):
+    out_time: float  # seconds of output written so far
+    speed: float  # multiple of real time, 0 when unknown
+    percent: float  # 0-100 of the expected duration, 0 when unknown
+    eta: Optional[float]  # seconds left, None when unknown
+
+    def describe(self) -> str:
+        text = f"{self.percent:.0f}%"
+        if self.speed > 0:
+            text += f" ({self.speed:.1f}x"
+            if self.eta is not None:
+                minutes, seconds = divmod(int(self.eta), 60)
+                text += f", ETA {minutes}m {seconds:02d}s" if minutes else f", ETA {seconds}s"
+            text += ")"
+        return text
+
+
+class FFmpegResult(NamedTuple):
+    returncode: int
+    stderr: str  # only the last lines, for error reports
+
+
+def concat_quote(path: str) -> str:
+    """path quoted for an FFmpeg concat list, where a ' inside single quotes is written '\\''"""
+    return "'" + path.replace("'", "'\\''") + "'"
+
+
+def _parse_float(value: str) -> float:
+    try:
+        return float(value.rstrip('x'))
+    except ValueError:
+        return 0.0
+
+
+def run_ffmpeg(cmd: List[str], duration: float = 0, on_progress: Callable[[FFmpegProgress], None] = None,
+               tail_lines: int = 40, machine_progress: bool = True) -> FFmpegResult:
+    """Run an ffmpeg command, parsing its -progress output as it arrives.
+
+    Unlike subprocess.run(capture_output=True) this never holds the whole of
+    stderr in memory: only the last tail_lines are kept for error reports.
+    """
+    if machine_progress:
+        cmd = [cmd[0], '-progress', 'pipe:1', '-nostats', *cmd[1:]]
+
+    process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               text=True, encoding='utf-8', errors='replace', **subprocess_kwargs)
+    stderr_tail = deque(maxlen=tail_lines)
+
+    def drain_stderr():
+        for line in process.stderr:
+            stderr_tail.append(line.rstrip('\n'))
+
+    stderr_thread = threading.Thread(target=drain_stderr, daemon=True)
+    stderr_thread.start()
+
+    fields = {}
+    for line in process.stdout:
+        key, _, value = line.strip().partition('=')
+        if key != 'progress':
+            fields[key] = value
+            continue
+
+        # A 'progress=continue|end' line closes each block of key=value pairs
+        microseconds = fields.get('out_time_us') or fields.get('out_time_ms') or '0'
+        out_time = _parse_float(microseconds) / 1_000_000
+        speed = _parse_float(fields.get('speed', '0'))
+        percent = min(100.0, out_time / duration * 100) if duration > 0 else 0.0
+        eta = (duration - out_time) / speed if duration > 0 and speed > 0 else None
+        if on_progress:
+            on_progress(FFmpegProgress(out_time, speed, percent, eta))
+        fields = {}
+
+    process.wait()
+    stderr_thread.join()
+    return FFmpegResult(process.returncode, "\n".join(stderr_tail))
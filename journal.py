@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import threading
+from typing import Dict, List, Optional
+
+JOURNAL_NAME = ".split45_journal.jsonl"
+COMPACT_THRESHOLD = 1024 * 1024
+
+
+class JobState:
+    """Everything the journal knows about one URL or input file"""
+
+    def __init__(self):
+        self.downloaded: Optional[Dict] = None  # MediaJob fields of the downloaded file
+        self.probed: Optional[Dict] = None  # duration plus the input's size and mtime_ns
+        self.parts: Dict[int, Dict] = {}  # part number -> {'path', 'size'}
+        self.deleted = False
+        self.outputs: Optional[List[str]] = None  # set once the job is done
+
+    @property
+    def done(self) -> bool:
+        return self.outputs is not None
+
+    def apply(self, record: Dict):
+        event = record.get('event')
+        if event == 'downloaded':
+            self.downloaded = record.get('job_record')
+        elif event == 'probed':
+            self.probed = {key: record.get(key) for key in ('duration', 'size', 'mtime_ns')}
+        elif event == 'part':
+            self.parts[int(record['index'])] = {'path': record['path'], 'size': record['size']}
+        elif event == 'deleted':
+            self.deleted = True
+        elif event == 'done':
+            outputs = record.get('outputs')
+            self.outputs = list(outputs) if outputs is not None else None
+
+    def valid_parts(self) -> Dict[int, str]:
+        """Recorded parts that are still on disk with the size they were written with"""
+        valid = {}
+        for index, part in self.parts.items():
+            try:
+                if os.path.getsize(part['path']) == part['size']:
+                    valid[index] = part['path']
+            except OSError:
+                pass
+        return valid
+
+    def records(self, job: str) -> List[Dict]:
+        """The minimal records that rebuild this state, used when compacting"""
+        records = []
+        if self.downloaded is not None:
+            records.append({'job': job, 'event': 'downloaded', 'job_record': self.downloaded})
+        if self.probed is not None:
+            records.append({'job': job, 'event': 'probed', **self.probed})
+        for index, part in sorted(self.parts.items()):
+            records.append({'job': job, 'event': 'part', 'index': index, **part})
+        if self.deleted:
+            records.append({'job': job, 'event': 'deleted'})
+        if self.outputs is not None:
+            records.append({'job': job, 'event': 'done', 'outputs': self.outputs})
+        return records
+
+
+class Journal:
+    """Append-only write-ahead log of download/probe/part/delete steps in the output folder.
+
+    Every record is flushed and fsynced before the step it describes is relied
+    on, so after a crash or a closed window the batch can resume from the first
+    unfinished step. A torn last line from a crash mid-write is ignored.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._states: Dict[str, JobState] = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self._replay(record)
+        if os.path.getsize(self.path) > COMPACT_THRESHOLD:
+            self.compact()
+
+    def _replay(self, record: Dict):
+        job = record.get('job')
+        if not job:
+            return
+        if record.get('event') == 'reset':
+            self._states.pop(job, None)
+            return
+        self._states.setdefault(job, JobState()).apply(record)
+
+    def record(self, job: str, event: str, **fields):
+        entry = {'job': job, 'event': event, 'time': round(time.time(), 3), **fields}
+        with self._lock:
+            self._replay(entry)
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                print(f"Could not write job journal: {e}")
+
+    def reset(self, job: str):
+        self.record(job, 'reset')
+
+    def state(self, job: str) -> Optional[JobState]:
+        with self._lock:
+            return self._states.get(job)
+
+    def compact(self):
+        """Rewrite the journal as one minimal set of records per job"""
+        with self._lock:
+            temp_path = self.path + ".tmp"
+            try:
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    for job, state in self._states.items():
+                        for record in state.records(job):
+                            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                print(f"Could not compact job journal: {e}")
+
+
+def download_key(url: str, audio_only: bool) -> str:
+    return f"download:{'mp3' if audio_only else 'mp4'}:{url}"
+
+
+def process_key(file_path: str, audio_only: bool) -> str:
+    return f"process:{'mp3' if audio_only else 'mp4'}:{os.path.abspath(file_path)}"
+
+
+_journals: Dict[str, Journal] = {}
+_journals_lock = threading.Lock()
+
+
+def get_journal(output_folder: str) -> Journal:
+    """One shared journal per output folder, so the downloader and processor append to the same log"""
+    path = os.path.abspath(os.path.join(output_folder, JOURNAL_NAME))
+    with _journals_lock:
+        if path not in _journals:
+            _journals[path] = Journal(path)
+        return _journals[path]
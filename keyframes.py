@@ -0,0 +1,138 @@
+import os
+import json
+import bisect
+import math
+import hashlib
+import subprocess
+from typing import List, NamedTuple, Optional
+from toolchain import subprocess_kwargs
+
+
+class PlannedPart(NamedTuple):
+    start: float
+    end: float
+    exact_start: bool  # True when start is not a keyframe and the first GOP must be re-encoded
+
+
+class KeyframeIndex:
+    """Sorted presentation times (seconds) of the video keyframes of one input"""
+
+    def __init__(self, times: List[float]):
+        self.times = sorted(times)
+
+    def __len__(self):
+        return len(self.times)
+
+    def is_keyframe(self, t: float, epsilon: float = 0.001) -> bool:
+        i = bisect.bisect_left(self.times, t - epsilon)
+        return i < len(self.times) and self.times[i] <= t + epsilon
+
+    def nearest(self, t: float) -> Optional[float]:
+        if not self.times:
+            return None
+        i = bisect.bisect_left(self.times, t)
+        candidates = self.times[max(0, i - 1):i + 1]
+        return min(candidates, key=lambda k: abs(k - t))
+
+    def next_at_or_after(self, t: float, epsilon: float = 0.001) -> Optional[float]:
+        i = bisect.bisect_left(self.times, t - epsilon)
+        return self.times[i] if i < len(self.times) else None
+
+
+def nominal_boundaries(duration: float, segment_length: float) -> List[float]:
+    """Every segment_length mark inside duration, where plan_cuts looks for keyframes"""
+    count = max(0, math.ceil(duration / segment_length) - 1)
+    return [segment_length * (i + 1) for i in range(count)]
+
+
+def read_intervals(boundaries: List[float], before: float, after: float) -> str:
+    """An ffprobe -read_intervals value covering each boundary from before ahead of it to after past it"""
+    return ",".join(f"{max(0.0, t - before):.3f}%+{before + after:.3f}" for t in boundaries)
+
+
+def _cache_path(cache_dir: str, file_path: str, intervals: str = "") -> str:
+    stat = os.stat(file_path)
+    identity = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}|{intervals}"
+    return os.path.join(cache_dir, hashlib.sha1(identity.encode("utf-8")).hexdigest() + ".json")
+
+
+def load_keyframe_index(ffprobe_path: str, file_path: str, cache_dir: str = None,
+                        boundaries: List[float] = None, before: float = 5.0,
+                        after: float = 20.0) -> Optional[KeyframeIndex]:
+    """Build the keyframe index of the first video stream from ffprobe packet flags, cached per file identity.
+
+    With boundaries, ffprobe reads only the packets from before seconds ahead
+    of each boundary to after seconds past it (seeking between them), so the
+    index costs a few reads per cut instead of a pass over the whole file.
+    It then only knows keyframes inside those windows, which is all
+    plan_cuts and smart rendering ask about.
+    """
+    intervals = read_intervals(boundaries, before, after) if boundaries is not None else ""
+    if boundaries is not None and not boundaries:
+        return KeyframeIndex([])
+
+    cache_file = None
+    if cache_dir:
+        try:
+            cache_file = _cache_path(cache_dir, file_path, intervals)
+            if os.path.exists(cache_file):
+                with open(cache_file, 'r') as f:
+                    return KeyframeIndex(json.load(f))
+        except Exception as e:
+            print(f"Could not read keyframe cache: {e}")
+
+    cmd = [
+        ffprobe_path, '-v', 'error', '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', file_path
+    ]
+    if intervals:
+        cmd[-2:-2] = ['-read_intervals', intervals]
+
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, **subprocess_kwargs)
+        if result.returncode != 0:
+            print(f"FFprobe error: {result.stderr}")
+            return None
+    except Exception as e:
+        print(f"Error reading keyframes: {e}")
+        return None
+
+    times = []
+    for line in result.stdout.splitlines():
+        fields = line.strip().split(',')
+        if len(fields) >= 2 and 'K' in fields[1] and fields[0] not in ('', 'N/A'):
+            times.append(float(fields[0]))
+
+    if cache_file:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_file, 'w') as f:
+                json.dump(times, f)
+        except Exception as e:
+            print(f"Could not write keyframe cache: {e}")
+
+    return KeyframeIndex(times)
+
+
+def plan_cuts(index: Optional[KeyframeIndex], duration: float, segment_length: float,
+              tolerance: float) -> List[PlannedPart]:
+    """Snap every nominal part boundary to the nearest keyframe within tolerance.
+
+    Boundaries without a keyframe close enough keep their nominal time and are
+    marked exact_start, so only the GOP that follows them needs re-encoding.
+    """
+    boundaries = [0.0]
+    exact = [False]
+    t = float(segment_length)
+    while t < duration:
+        keyframe = index.nearest(t) if index else None
+        if keyframe is not None and abs(keyframe - t) <= tolerance and keyframe > boundaries[-1]:
+            boundaries.append(keyframe)
+            exact.append(False)
+        else:
+            boundaries.append(t)
+            exact.append(index is not None and len(index) > 0 and not index.is_keyframe(t))
+        t += segment_length
+    boundaries.append(duration)
+
+    return [PlannedPart(boundaries[i], boundaries[i + 1], exact[i]) for i in range(len(boundaries) - 1)]
@@ -2,15 +2,17 @@ import customtkinter as ctk
 import tkinter as tk
 from tkinter import filedialog
 import threading
-import queue
 import time
 import json
 from datetime import datetime, timedelta
-from downloader import VideoDownloader
-from processor import MediaProcessor
 import os
+from progress_bus import JobProgress, ProgressBus, ProgressEvent
+from throughput import BatchEstimate, get_throughput_model
+import tracing
 
 class App(ctk.CTk):
+    PROGRESS_FRAME_MS = 33
+
     def __init__(self):
         super().__init__()
         self.title("Split45")
@@ -19,7 +21,6 @@ class App(ctk.CTk):
         ctk.set_default_color_theme("blue")
         self.settings_file = os.path.join(os.path.dirname(__file__), "settings.json")
         self.output_folder = self.load_output_folder()
-        self.download_queue = queue.Queue()
         self.processing_active = False
         self.download_stats = {"current": 0, "total": 0, "completed": 0}
         self.processing_stats = {"current": 0, "completed": 0, "total_segments": 0}
@@ -28,14 +29,21 @@ class App(ctk.CTk):
         self.processing_start_time = None
         self.estimated_time = None
         self.timer_running = False
+        self.progress_bus = ProgressBus()
+        self.throughput = get_throughput_model()
+        # Bars weighted by expected seconds, so a long video counts for more than a short one
+        self.download_board = JobProgress(self.throughput.download_seconds())
+        self.process_board = JobProgress(self.throughput.processing_seconds())
         self.setup_output_folder_selection()
         self.tabview = ctk.CTkTabview(self)
         self.tabview.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         self.download_tab = self.tabview.add("Download")
         self.setup_download_tab()
         self.process_tab = self.tabview.add("Process")
-        self.setup_process_tab()
+        self.process_tab_ready = False
+        self.tabview.configure(command=self.tab_changed)
         self.update_processors()
+        self.after(self.PROGRESS_FRAME_MS, self.drain_progress)
 
     def load_output_folder(self):
         try:
@@ -61,21 +69,13 @@ class App(ctk.CTk):
         except Exception as e:
             print(f"Error saving settings: {e}")
 
-    def estimate_time(self, video_count, audio_only=False, pipeline=False):
-        """Estimate completion time based on video count and options"""
-        download_time_per_video = 25 if audio_only else 35
-        processing_time_per_video = 10 if audio_only else 15
-        
-        delay_time = (video_count - 1) * 3 if video_count > 1 else 0
-        
-        if pipeline:
-            total_download_time = (video_count * download_time_per_video) + delay_time
-            total_processing_time = video_count * processing_time_per_video
-            estimated_seconds = max(total_download_time, total_processing_time) + (video_count * 2)
-        else:
-            estimated_seconds = ((video_count * download_time_per_video) + delay_time) + (video_count * processing_time_per_video)
-        
-        return estimated_seconds
+    def estimate_time(self, video_count, audio_only=False, pipeline=False, batch=None):
+        """Estimate completion time from the throughput measured on earlier runs.
+
+        batch holds the downloads already finished, whose durations and sizes are known.
+        """
+        batch = batch or BatchEstimate(self.throughput, audio_only, download=True, pipeline=pipeline)
+        return batch.estimate(video_count)
 
     def format_duration(self, seconds):
         if seconds < 60:
@@ -133,13 +133,38 @@ class App(ctk.CTk):
             print(f"Output folder changed to: {folder}")
 
     def update_processors(self):
-        self.downloader = VideoDownloader(self.update_download_progress, self.output_folder)
-        self.processor = MediaProcessor(self.update_processing_progress, self.output_folder)
+        """Drop the current downloader/processor; they are rebuilt for the new folder on first use"""
+        self._downloader = None
+        self._processor = None
+
+    @property
+    def downloader(self):
+        if self._downloader is None:
+            from downloader import VideoDownloader
+            self._downloader = VideoDownloader(self.progress_bus.callback("download"), self.output_folder)
+        return self._downloader
+
+    @property
+    def processor(self):
+        if self._processor is None:
+            from processor import MediaProcessor
+            self._processor = MediaProcessor(self.progress_bus.callback("process"), self.output_folder)
+        return self._processor
+
+    def tab_changed(self):
+        if self.tabview.get() == "Process":
+            self.ensure_process_tab()
+
+    def ensure_process_tab(self):
+        """The Process tab is built the first time it is shown, not before the window appears"""
+        if not self.process_tab_ready:
+            self.process_tab_ready = True
+            self.setup_process_tab()
 
     def setup_download_tab(self):
         url_frame = ctk.CTkFrame(self.download_tab)
         url_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        url_label = ctk.CTkLabel(url_frame, text="Enter YouTube URLs (one per line, max 10):")
+        url_label = ctk.CTkLabel(url_frame, text="Enter YouTube URLs (one per line; playlists and channels are expanded):")
         url_label.pack(padx=10, pady=5)
         self.url_text = ctk.CTkTextbox(url_frame, height=200)
         self.url_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
@@ -157,6 +182,13 @@ class App(ctk.CTk):
             variable=self.process_together_var
         )
         self.process_together_checkbox.pack(padx=10, pady=5)
+        self.stream_var = ctk.BooleanVar()
+        self.stream_checkbox = ctk.CTkCheckBox(
+            url_frame,
+            text="Split while downloading (streaming: parts appear as they finish, no original kept)",
+            variable=self.stream_var
+        )
+        self.stream_checkbox.pack(padx=10, pady=5)
         self.download_button = ctk.CTkButton(
             url_frame,
             text="Download",
@@ -233,42 +265,54 @@ class App(ctk.CTk):
     def format_changed(self, value):
         pass
 
-    def update_download_progress(self, message, progress):
-        """Update download progress and stats"""
-        def update():
+    def update_download_progress(self, message, progress, job_id=None):
+        """Publish download progress; safe to call from any thread"""
+        self.progress_bus.publish(ProgressEvent("download", message, progress, job_id))
+
+    def update_processing_progress(self, message, progress, job_id=None):
+        """Publish processing progress; safe to call from any thread"""
+        self.progress_bus.publish(ProgressEvent("process", message, progress, job_id))
+
+    def drain_progress(self):
+        """Redraw each stage once per frame, its bar combining the latest state of every file in the batch"""
+        total = max(self.download_stats["total"], self._downloader.total_files if self._downloader else 0)
+        self.download_board.set_total(total)
+        self.process_board.set_total(total)
+        for event in self.progress_bus.drain():
+            if event.stage == "download":
+                self.render_download_progress(*self.download_board.update(event))
+            elif event.stage == "process":
+                self.render_processing_progress(*self.process_board.update(event))
+        self.after(self.PROGRESS_FRAME_MS, self.drain_progress)
+
+    def render_download_progress(self, message, progress):
+        self.download_progress_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        clean_message = message
+        if "(elapsed:" in clean_message:
+            clean_message = clean_message.split(" (elapsed:")[0]
+        if "estimated time:" in clean_message:
+            clean_message = clean_message.split(" - estimated time:")[0]
+        
+        self.download_status.configure(text=clean_message)
+        if progress >= 0:
+            self.download_progress.set(progress / 100)
+
+    def render_processing_progress(self, message, progress):
+        if self.processing_active:
             self.download_progress_frame.pack(fill=tk.X, padx=10, pady=5)
             
-            clean_message = message
-            if "(elapsed:" in clean_message:
-                clean_message = clean_message.split(" (elapsed:")[0]
-            if "estimated time:" in clean_message:
-                clean_message = clean_message.split(" - estimated time:")[0]
-            
-            self.download_status.configure(text=clean_message)
-            if progress >= 0:
-                self.download_progress.set(progress / 100)
-
-        self.after(10, update)
-
-    def update_processing_progress(self, message, progress):
-        """Update processing progress and stats"""
-        def update():
-            if self.processing_active:
-                self.download_progress_frame.pack(fill=tk.X, padx=10, pady=5)
-                
-                self.processing_header_frame.pack(fill=tk.X, padx=10, pady=(10,0))
-                self.processing_progress.pack(fill=tk.X, padx=10, pady=2)
-                self.processing_status.pack(anchor="w", padx=10, pady=(2,5))
+            self.processing_header_frame.pack(fill=tk.X, padx=10, pady=(10,0))
+            self.processing_progress.pack(fill=tk.X, padx=10, pady=2)
+            self.processing_status.pack(anchor="w", padx=10, pady=(2,5))
+        
+        clean_message = message
+        if "(elapsed:" in clean_message:
+            clean_message = clean_message.split(" (elapsed:")[0]
             
-            clean_message = message
-            if "(elapsed:" in clean_message:
-                clean_message = clean_message.split(" (elapsed:")[0]
-                
-            self.processing_status.configure(text=clean_message)
-            if progress >= 0:
-                self.processing_progress.set(progress / 100)
-
-        self.after(10, update)
+        self.processing_status.configure(text=clean_message)
+        if progress >= 0:
+            self.processing_progress.set(progress / 100)
 
     def update_progress(self, filename, progress):
         """Legacy progress callback for single operations"""
@@ -288,6 +332,7 @@ class App(ctk.CTk):
                 self.download_status.configure(text=status_text)
                 self.download_progress.set(progress_value)
             else:
+                self.ensure_process_tab()
                 self.process_status.configure(text=status_text)
                 self.process_progress.set(progress_value)
 
@@ -296,7 +341,7 @@ class App(ctk.CTk):
     def select_files(self):
         files = filedialog.askopenfilenames(
             title="Select files to process",
-            filetypes=[("Media files", "*.mp4 *.mp3")]
+            filetypes=[("Media files", "*.mp4 *.mp3 *.m4a *.opus *.webm")]
         )
         self.selected_files_text.delete("1.0", tk.END)
         self.selected_files_text.insert("1.0", "\n".join(files))
@@ -305,10 +350,6 @@ class App(ctk.CTk):
         urls = self.url_text.get("1.0", tk.END).strip().split("\n")
         urls = [url.strip() for url in urls if url.strip()]
         
-        if len(urls) > 10:
-            self.download_status.configure(text="Maximum 10 URLs allowed")
-            return
-        
         if not urls:
             self.download_status.configure(text="Please enter at least one URL")
             return
@@ -316,11 +357,14 @@ class App(ctk.CTk):
         self.download_button.configure(state="disabled")
         audio_only = self.download_format.get() == "MP3"
         process_together = self.process_together_var.get()
+        streaming = self.stream_var.get()
         
         # Reset stats and start timing
         self.download_stats = {"current": 0, "total": len(urls), "completed": 0}
         self.processing_stats = {"current": 0, "completed": 0, "total_segments": 0}
         self.processing_active = process_together
+        self.download_board.reset(len(urls), self.throughput.download_seconds(audio_only=audio_only))
+        self.process_board.reset(len(urls), self.throughput.processing_seconds(audio_only=audio_only))
         self.start_time = time.time()
         
         # Store estimated time and start continuous timer
@@ -329,13 +373,19 @@ class App(ctk.CTk):
         
         # Show time estimate
         media_type = "audio files" if audio_only else "videos"
-        mode = "pipeline" if process_together else "sequential"
+        mode = "streaming" if streaming else "pipeline" if process_together else "sequential"
         
         self.download_status.configure(
             text=f"⏱️ Starting {mode} processing of {len(urls)} {media_type} - estimated time: {self.format_duration(self.estimated_time)}"
         )
         
-        if process_together:
+        if streaming:
+            thread = threading.Thread(
+                target=self.stream_thread,
+                args=(urls, audio_only)
+            )
+            thread.start()
+        elif process_together:
             # Start pipeline mode
             self.start_pipeline(urls, audio_only)
         else:
@@ -347,160 +397,103 @@ class App(ctk.CTk):
             thread.start()
 
     def start_pipeline(self, urls, audio_only):
-        """Start the concurrent download-process pipeline"""
+        """Start the download -> probe -> split -> cleanup pipeline"""
         print("🚀 Starting pipeline mode: download + process concurrently")
-        
-        while not self.download_queue.empty():
-            try:
-                self.download_queue.get_nowait()
-            except queue.Empty:
-                break
-        
-        download_thread = threading.Thread(
-            target=self.pipeline_download_thread,
+        thread = threading.Thread(
+            target=self.pipeline_thread,
             args=(urls, audio_only)
         )
-        download_thread.start()
-        
-        processing_thread = threading.Thread(
-            target=self.pipeline_processing_thread,
-            args=(audio_only,)
-        )
-        processing_thread.start()
+        thread.start()
 
-    def pipeline_download_thread(self, urls, audio_only):
-        """Download files and queue them for processing"""
-        try:
-            self.download_start_time = time.time()
-            media_type = "audio files" if audio_only else "videos"
-            
-            for idx, url in enumerate(urls):
-                self.download_stats["current"] = idx + 1
-                
-                if idx > 0:
-                    print(f"Waiting 3 seconds before next download to avoid YouTube throttling...")
-                    time.sleep(3)
-                
-                try:
-                    self.update_download_progress(
-                        f"⬇️ Downloading {idx + 1}/{len(urls)}: {media_type[:-1]}", 0
-                    )
-                    
-                    downloaded_files = self.downloader.download_videos([url], audio_only)
-                    
-                    if downloaded_files:
-                        self.download_stats["completed"] += 1
-                        
-                        self.download_queue.put({
-                            'file': downloaded_files[0],
-                            'audio_only': audio_only,
-                            'index': idx + 1,
-                            'total': len(urls)
-                        })
-                        
-                        self.update_download_progress(
-                            f"✅ Downloaded {idx + 1}/{len(urls)} - queued for processing", 
-                            ((idx + 1) / len(urls)) * 100
-                        )
-                    else:
-                        self.update_download_progress(f"❌ Failed {idx + 1}/{len(urls)}", -1)
-                        
-                except Exception as e:
-                    print(f"Error downloading {url}: {e}")
-                    self.update_download_progress(f"❌ Error {idx + 1}/{len(urls)}: {str(e)}", -1)
-            
-            self.download_queue.put(None)
-            
-            completed = self.download_stats["completed"]
-            total = len(urls)
-            
-            if completed == total:
-                self.update_download_progress(
-                    f"🎉 All {completed} {media_type} downloaded! Processing in progress...", 100
-                )
-            else:
-                self.update_download_progress(
-                    f"Downloaded {completed}/{total} {media_type}. Processing in progress...", 100
-                )
-                
-        except Exception as e:
-            print(f"Pipeline download error: {e}")
-            self.update_download_progress(f"❌ Download error: {str(e)}", -1)
-            self.download_queue.put(None)
-
-    def pipeline_processing_thread(self, audio_only):
-        """Process files from the download queue"""
-        processed_files = []
-        total_segments = 0
+    def pipeline_thread(self, urls, audio_only):
+        """Run every URL through the pipeline engine, which keeps all stages busy at once"""
+        from pipeline import run_media_pipeline
+
+        media_type = "audio files" if audio_only else "videos"
+        # Running totals rather than a list of every job, so each download costs the same to estimate
+        downloaded = BatchEstimate(self.throughput, audio_only, download=True, pipeline=True)
+        self.download_start_time = time.time()
         self.processing_start_time = time.time()
-        
+
+        def on_downloaded(item):
+            self.download_stats["completed"] += 1
+            self.download_stats["current"] = self.download_stats["completed"]
+            downloaded.add(item.job.duration, item.job.filesize)
+            job_id = str(item.index)
+            self.download_board.weigh(job_id, self.throughput.download_seconds(item.job.duration, item.job.filesize,
+                                                                               audio_only))
+            self.process_board.weigh(job_id, self.throughput.processing_seconds(item.job.duration, item.job.filesize,
+                                                                                audio_only))
+            # Playlists and channels grow the total as their pages are read
+            total = max(len(urls), self.downloader.total_files)
+            self.download_stats["total"] = total
+            self.estimated_time = self.estimate_time(total, audio_only, True, downloaded)
+            self.update_download_progress(
+                f"✅ Downloaded {item.index}/{total} - queued for processing", 100, str(item.index)
+            )
+
+        def on_processed(item):
+            self.processing_stats["current"] = item.index
+            self.processing_stats["completed"] += 1
+            self.processing_stats["total_segments"] += len(item.outputs)
+            self.update_processing_progress(
+                f"✅ Processed {item.index}/{self.downloader.total_files}: {len(item.outputs)} segments created", 100,
+                str(item.index)
+            )
+
         try:
-            while True:
-                item = self.download_queue.get()
-                
-                if item is None:
-                    break
-                
-                file_path = item['file']
-                file_index = item['index']
-                file_total = item['total']
-                
-                self.processing_stats["current"] = file_index
-                
-                try:
-                    self.update_processing_progress(
-                        f"⚙️ Processing {file_index}/{file_total}: {os.path.basename(file_path)}", 0
-                    )
-                    
-                    segments = self.processor.process_video(file_path, audio_only, delete_original=True)
-                    
-                    if segments:
-                        processed_files.extend(segments)
-                        total_segments += len(segments)
-                        self.processing_stats["completed"] += 1
-                        self.processing_stats["total_segments"] = total_segments
-                        
-                        self.update_processing_progress(
-                            f"✅ Processed {file_index}/{file_total}: {len(segments)} segments created", 100
-                        )
-                    else:
-                        self.update_processing_progress(f"❌ Failed processing {file_index}/{file_total}", -1)
-                        
-                except Exception as e:
-                    print(f"Error processing {file_path}: {e}")
-                    self.update_processing_progress(f"❌ Error processing {file_index}/{file_total}: {str(e)}", -1)
-                
-                self.download_queue.task_done()
-            
-            total_time = self.get_elapsed_time(self.start_time)
+            self.update_download_progress(f"⬇️ Downloading {len(urls)} {media_type}...", 0)
+            run_media_pipeline(self.downloader, self.processor, urls, audio_only, on_result=lambda item: None,
+                               on_downloaded=on_downloaded, on_processed=on_processed)
+
             completed_downloads = self.download_stats["completed"]
             completed_processing = self.processing_stats["completed"]
-            media_type = "audio files" if audio_only else "videos"
-            
-            if completed_processing > 0:
+            total_segments = self.processing_stats["total_segments"]
+            if completed_processing:
                 self.update_processing_progress(
                     f"🎉 Pipeline complete! Processed {completed_processing} {media_type}, created {total_segments} segments", 100
                 )
-                
                 self.update_download_progress(
                     f"🚀 Pipeline finished! {completed_downloads} downloaded, {completed_processing} processed, {total_segments} segments created", 100
                 )
             else:
                 self.update_processing_progress("❌ No files processed successfully", -1)
-                
+
         except Exception as e:
-            print(f"Pipeline processing error: {e}")
-            self.update_processing_progress(f"❌ Processing error: {str(e)}", -1)
+            print(f"Pipeline error: {e}")
+            self.update_processing_progress(f"❌ Pipeline error: {str(e)}", -1)
         finally:
             self.processing_active = False
             self.stop_time_updater()
             self.after(10, lambda: self.download_button.configure(state="normal"))
 
+    def stream_thread(self, urls, audio_only):
+        """Download and split at the same time, piping each download straight into FFmpeg"""
+        try:
+            from streaming import stream_split
+            segments = stream_split(self.downloader, self.processor, urls, audio_only)
+            total_time = self.get_elapsed_time(self.start_time)
+            media_type = "audio files" if audio_only else "videos"
+
+            if segments:
+                self.after(10, lambda: self.download_status.configure(
+                    text=f"🎉 Streamed {len(urls)} {media_type} in {self.format_duration(total_time)}, created {len(segments)} segments!"
+                ))
+            else:
+                self.after(10, lambda: self.download_status.configure(text=f"❌ Streaming failed after {self.format_duration(total_time)}"))
+
+        except Exception as e:
+            elapsed = self.get_elapsed_time(self.start_time)
+            self.after(10, lambda: self.download_status.configure(text=f"❌ Error after {self.format_duration(elapsed)}: {str(e)}"))
+        finally:
+            self.stop_time_updater()
+            self.after(10, lambda: self.download_button.configure(state="normal"))
+
     def download_thread(self, urls, audio_only, process_together):
         """Traditional sequential download thread"""
         try:
             self.after(10, lambda: self.download_status.configure(text="Starting downloads..."))
-            downloaded_files = self.downloader.download_videos(urls, audio_only)
+            downloaded_files = self.downloader.download_videos(urls, audio_only, process=process_together)
             
             if downloaded_files:
                 media_type = "audio files" if audio_only else "videos"
@@ -544,10 +537,13 @@ class App(ctk.CTk):
 
         self.process_button.configure(state="disabled")
         audio_only = self.output_format.get() == "Convert to MP3"
+        self.process_board.reset()
         
         # Start timing and show estimate
         self.start_time = time.time()
-        self.estimated_time = len(files) * 15  # Rough estimate for processing only
+        self.estimated_time = self.throughput.estimate_batch(
+            [(None, os.path.getsize(f) if os.path.exists(f) else None) for f in files], audio_only, download=False
+        )
         self.start_time_updater()
         
         media_type = "audio files" if audio_only else "videos"
@@ -602,8 +598,10 @@ class App(ctk.CTk):
             
             # Update download time display
             if hasattr(self, 'download_time_label'):
-                if self.estimated_time and elapsed < 5:  # Show estimate for first 5 seconds
-                    self.download_time_label.configure(text=f"Est: {self.format_duration(self.estimated_time)}")
+                if self.estimated_time and elapsed < self.estimated_time:
+                    self.download_time_label.configure(
+                        text=f"Elapsed: {self.format_duration(elapsed)} / Est: {self.format_duration(self.estimated_time)}"
+                    )
                 else:
                     self.download_time_label.configure(text=f"Elapsed: {self.format_duration(elapsed)}")
             
@@ -616,5 +614,6 @@ class App(ctk.CTk):
             self.after(1000, self.update_time_displays)  # Update every second
 
 if __name__ == "__main__":
+    tracing.enable_from_env()
     app = App()
     app.mainloop() 
\ No newline at end of file
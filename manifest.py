@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import List, Optional
+
+MANIFEST_VERSION = 1
+SAMPLE_SIZE = 64 * 1024
+SAMPLE_COUNT = 8
+
+
+def fingerprint(file_path: str, sample_size: int = SAMPLE_SIZE, samples: int = SAMPLE_COUNT) -> str:
+    """Fast content hash: the size plus evenly spaced blocks, including the first and last.
+
+    Reads at most samples * sample_size bytes however large the file is, so a
+    renamed or re-downloaded copy of the same media is recognised without
+    hashing gigabytes.
+    """
+    size = os.path.getsize(file_path)
+    digest = hashlib.blake2b(str(size).encode('ascii'), digest_size=20)
+    with open(file_path, 'rb') as f:
+        if size <= sample_size * samples:
+            digest.update(f.read())
+        else:
+            step = (size - sample_size) / (samples - 1)
+            for i in range(samples):
+                f.seek(int(i * step))
+                digest.update(f.read(sample_size))
+    return digest.hexdigest()
+
+
+class OutputManifest:
+    """Maps an input fingerprint plus the split parameters to the parts they produced"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._initialized:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS outputs ("
+                " key TEXT PRIMARY KEY, source TEXT NOT NULL, parts TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._initialized = True
+        return conn
+
+    @staticmethod
+    def make_key(file_fingerprint: str, **params) -> str:
+        params['version'] = MANIFEST_VERSION
+        return file_fingerprint + "|" + json.dumps(params, sort_keys=True)
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """The recorded outputs, if every one is still on disk with the size it was written with"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    row = conn.execute("SELECT parts FROM outputs WHERE key = ?", (key,)).fetchone()
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            print(f"Could not read output manifest: {e}")
+            return None
+
+        if row is None:
+            return None
+        parts = json.loads(row[0])
+        for part in parts:
+            try:
+                if os.path.getsize(part['path']) != part['size']:
+                    return None
+            except OSError:
+                return None
+        return [part['path'] for part in parts]
+
+    def put(self, key: str, source: str, outputs: List[str]):
+        try:
+            parts = [{'path': path, 'size': os.path.getsize(path)} for path in outputs]
+            with self._lock:
+                conn = self._connect()
+                try:
+                    with conn:
+                        conn.execute(
+                            "INSERT OR REPLACE INTO outputs (key, source, parts, created) VALUES (?, ?, ?, ?)",
+                            (key, os.path.abspath(source), json.dumps(parts), time.time())
+                        )
+                finally:
+                    conn.close()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Could not write output manifest: {e}")
@@ -0,0 +1,80 @@
+import os
+from typing import NamedTuple, Optional, Union
+
+# yt-dlp reports codecs as RFC 6381 strings (avc1.4d401e, mp4a.40.2); map them to ffprobe codec names
+CODEC_PREFIXES = {
+    'avc1': 'h264', 'avc3': 'h264', 'h264': 'h264',
+    'hev1': 'hevc', 'hvc1': 'hevc', 'h265': 'hevc',
+    'vp09': 'vp9', 'vp9': 'vp9', 'vp8': 'vp8',
+    'av01': 'av1',
+    'mp4a': 'aac', 'aac': 'aac',
+    'opus': 'opus', 'vorbis': 'vorbis', 'mp3': 'mp3',
+}
+
+
+def normalize_codec(codec: Optional[str]) -> Optional[str]:
+    if not codec or codec == 'none':
+        return None
+    prefix = codec.split('.')[0].lower()
+    return CODEC_PREFIXES.get(prefix, prefix)
+
+
+class MediaJob(NamedTuple):
+    """A downloaded file plus the metadata yt-dlp already extracted for it"""
+    file_path: str
+    url: str = ''
+    title: str = ''
+    duration: float = 0.0
+    container: str = ''
+    vcodec: Optional[str] = None
+    acodec: Optional[str] = None
+    filesize: int = 0
+    bit_rate: int = 0
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+    @classmethod
+    def from_info(cls, info: dict, file_path: str, url: str = '', audio_only: bool = False) -> 'MediaJob':
+        filesize = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        filesize = filesize or info.get('filesize') or info.get('filesize_approx') or 0
+        vcodec = None if audio_only else normalize_codec(info.get('vcodec'))
+        # yt-dlp's info describes the downloaded stream unless a postprocessor converted it to MP3
+        acodec = 'mp3' if file_path.endswith('.mp3') else normalize_codec(info.get('acodec'))
+        tbr = info.get('tbr') or info.get('abr') or 0
+        return cls(
+            file_path=file_path,
+            url=url or info.get('webpage_url', ''),
+            title=info.get('title', ''),
+            duration=float(info.get('duration') or 0),
+            container=os.path.splitext(file_path)[1].lstrip('.') or info.get('ext', ''),
+            vcodec=vcodec,
+            acodec=acodec,
+            filesize=int(filesize),
+            bit_rate=int(tbr * 1000),
+            width=None if audio_only else info.get('width'),
+            height=None if audio_only else info.get('height'),
+        )
+
+    def to_probe(self) -> dict:
+        """The same shape as probe_cache.summarize_probe, so the processor can skip ffprobe"""
+        streams = []
+        if self.vcodec:
+            stream = {'index': len(streams), 'codec_type': 'video', 'codec_name': self.vcodec}
+            if self.width and self.height:
+                stream.update(width=self.width, height=self.height)
+            streams.append(stream)
+        if self.acodec:
+            streams.append({'index': len(streams), 'codec_type': 'audio', 'codec_name': self.acodec})
+        return {
+            'duration': self.duration,
+            'bit_rate': self.bit_rate,
+            'format_name': self.container,
+            'size': self.filesize,
+            'streams': streams,
+            'codecs': [stream['codec_name'] for stream in streams],
+            'source': 'yt-dlp',
+        }
+
+
+def job_path(item: Union[str, MediaJob]) -> str:
+    return item.file_path if isinstance(item, MediaJob) else item
@@ -0,0 +1,294 @@
+import os
+import mmap
+import struct
+from typing import List, NamedTuple, Optional, Tuple
+from placement import copy_range
+
+# Layer III tables, indexed by the header's bitrate / sample-rate fields
+BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),  # MPEG-1
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),  # MPEG-2 and 2.5
+}
+SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+XING_FRAMES, XING_BYTES, XING_TOC = 0x1, 0x2, 0x4
+
+
+class FrameHeader(NamedTuple):
+    version: int  # header version bits: 3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5
+    sample_rate: int
+    bitrate: int  # kbit/s
+    length: int  # bytes, including the header and padding
+    samples: int  # per frame
+    side_info: int  # bytes between the header and the Xing tag
+
+    def same_stream(self, other: 'FrameHeader') -> bool:
+        return self.version == other.version and self.sample_rate == other.sample_rate
+
+
+def parse_header(data: bytes) -> Optional[FrameHeader]:
+    """Decode a 4-byte Layer III frame header, or None if it is not one"""
+    if len(data) < 4:
+        return None
+    h = int.from_bytes(data[:4], 'big')
+    version = (h >> 19) & 3
+    bitrate_index = (h >> 12) & 0xF
+    rate_index = (h >> 10) & 3
+    if (h >> 21) != 0x7FF or version == 1 or ((h >> 17) & 3) != 1 \
+            or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    mpeg1 = version == 3
+    bitrate = BITRATES[1 if mpeg1 else 2][bitrate_index]
+    sample_rate = SAMPLE_RATES[version][rate_index]
+    padding = (h >> 9) & 1
+    mono = ((h >> 6) & 3) == 3
+    length = (144000 if mpeg1 else 72000) * bitrate // sample_rate + padding
+    side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+    return FrameHeader(version, sample_rate, bitrate, length, 1152 if mpeg1 else 576, side_info)
+
+
+class Mp3Layout(NamedTuple):
+    tag_end: int  # end of the ID3v2 tag, 0 if there is none
+    tag_frame: Optional[Tuple[int, int]]  # offset and length of the Xing/Info/VBRI frame
+    audio_start: int  # first audio frame
+    audio_end: int  # end of the last frame, before any ID3v1 tag
+    first: FrameHeader
+    vbr: bool
+    frames: int  # audio frames, 0 when unknown
+
+    @property
+    def average_length(self) -> float:
+        """Mean frame size at the first frame's bitrate, padding included"""
+        return (144000 if self.first.version == 3 else 72000) * self.first.bitrate / self.first.sample_rate
+
+    @property
+    def frame_duration(self) -> float:
+        return self.first.samples / self.first.sample_rate
+
+    @property
+    def bitrate(self) -> float:
+        """Average kbit/s over the audio frames"""
+        duration = self.duration
+        return (self.audio_end - self.audio_start) * 8 / duration / 1000 if duration > 0 else 0.0
+
+    @property
+    def duration(self) -> float:
+        if self.frames:
+            return self.frames * self.frame_duration
+        return (self.audio_end - self.audio_start) * 8 / (self.first.bitrate * 1000)
+
+
+def _id3v2_end(data) -> int:
+    if len(data) >= 10 and data[:3] == b'ID3':
+        size = 0
+        for byte in data[6:10]:
+            size = (size << 7) | (byte & 0x7F)
+        footer = 10 if data[5] & 0x10 else 0
+        return 10 + size + footer
+    return 0
+
+
+def _frame_at(data, pos: int, end: int, reference: FrameHeader = None) -> Optional[FrameHeader]:
+    """The frame header at pos if it is followed by another valid frame (or the end of the audio)"""
+    header = parse_header(data[pos:pos + 4])
+    if header is None or (reference is not None and not header.same_stream(reference)):
+        return None
+    following = pos + header.length
+    if following > end:
+        return None
+    if following + 4 <= end:
+        next_header = parse_header(data[following:following + 4])
+        if next_header is None or not next_header.same_stream(header):
+            return None
+    return header
+
+
+def _sync(data, pos: int, end: int, reference: FrameHeader = None, limit: int = 64 * 1024) -> Optional[int]:
+    """The first offset at or after pos where a valid frame chain starts"""
+    stop = min(end, pos + limit)
+    while pos < stop:
+        pos = data.find(b'\xff', pos, stop)
+        if pos < 0:
+            return None
+        if _frame_at(data, pos, end, reference):
+            return pos
+        pos += 1
+    return None
+
+
+def _looks_cbr(data, first: FrameHeader, start: int, end: int, samples: int = 32) -> bool:
+    """Whether frames at the start and at points spread across the file all share the first bitrate.
+
+    Without a Xing/Info/VBRI frame this is the only sign of VBR; a wrong CBR
+    guess would put every cut and the duration off by the bitrate ratio.
+    """
+    pos = start
+    for _ in range(samples):
+        header = parse_header(data[pos:pos + 4])
+        if header is None or not header.same_stream(first):
+            break
+        if header.bitrate != first.bitrate:
+            return False
+        pos += header.length
+    for k in range(1, samples):
+        pos = _sync(data, start + (end - start) * k // samples, end, first)
+        if pos is not None and parse_header(data[pos:pos + 4]).bitrate != first.bitrate:
+            return False
+    return True
+
+
+def _count_frames(data, first: FrameHeader, start: int, end: int) -> int:
+    """Audio frames between start and end, by walking every header"""
+    frames, pos = 0, start
+    while pos + 4 <= end:
+        header = parse_header(data[pos:pos + 4])
+        if header is None or not header.same_stream(first):
+            synced = _sync(data, pos + 1, end, first)
+            if synced is None:
+                break
+            pos = synced
+            continue
+        pos += header.length
+        frames += 1
+    return frames
+
+
+def read_layout(data) -> Optional[Mp3Layout]:
+    """Locate the audio frames of an MP3 held in a bytes-like object (usually an mmap)"""
+    size = len(data)
+    audio_end = size - 128 if size >= 128 and data[size - 128:size - 125] == b'TAG' else size
+    tag_end = _id3v2_end(data)
+    first_pos = _sync(data, tag_end, audio_end)
+    if first_pos is None:
+        return None
+    first = parse_header(data[first_pos:first_pos + 4])
+
+    vbr, frames, tag_frame = False, 0, None
+    xing_pos = first_pos + 4 + first.side_info
+    marker = data[xing_pos:xing_pos + 4]
+    if marker in (b'Xing', b'Info'):
+        flags = struct.unpack('>I', data[xing_pos + 4:xing_pos + 8])[0]
+        if flags & XING_FRAMES:
+            frames = struct.unpack('>I', data[xing_pos + 8:xing_pos + 12])[0]
+        vbr = marker == b'Xing'
+        tag_frame = (first_pos, first.length)
+    elif data[first_pos + 36:first_pos + 40] == b'VBRI':
+        frames = struct.unpack('>I', data[first_pos + 50:first_pos + 54])[0]
+        vbr = True
+        tag_frame = (first_pos, first.length)
+
+    audio_start = first_pos + first.length if tag_frame else first_pos
+    if tag_frame:
+        synced = _sync(data, audio_start, audio_end, first)
+        if synced is None:
+            return None
+        audio_start = synced
+        first = parse_header(data[audio_start:audio_start + 4])
+    else:
+        vbr = not _looks_cbr(data, first, audio_start, audio_end)
+    if vbr and not frames:
+        frames = _count_frames(data, first, audio_start, audio_end)
+    return Mp3Layout(tag_end, tag_frame, audio_start, audio_end, first, vbr, frames)
+
+
+def _walk_cuts(data, layout: Mp3Layout, times: List[float]) -> List[Tuple[int, int]]:
+    """Exact (offset, frame index) of the frame nearest each time, by walking every header"""
+    cuts = []
+    pending = [round(t / layout.frame_duration) for t in times]
+    pos, index = layout.audio_start, 0
+    while pending and pos + 4 <= layout.audio_end:
+        if index >= pending[0]:
+            cuts.append((pos, index))
+            pending.pop(0)
+            continue
+        header = parse_header(data[pos:pos + 4])
+        if header is None or not header.same_stream(layout.first):
+            synced = _sync(data, pos + 1, layout.audio_end, layout.first)
+            if synced is None:
+                break
+            pos = synced
+            continue
+        pos += header.length
+        index += 1
+    return cuts
+
+
+def _seek_cuts(data, layout: Mp3Layout, times: List[float]) -> List[Tuple[int, int]]:
+    """Constant-bitrate cuts computed from the frame size, then synced to the nearest real frame"""
+    first = layout.first
+    average = layout.average_length
+    cuts = []
+    for t in times:
+        index = round(t / layout.frame_duration)
+        estimate = layout.audio_start + int(index * average)
+        pos = _sync(data, max(layout.audio_start, estimate - first.length // 2), layout.audio_end, first,
+                    limit=4 * first.length)
+        if pos is None:
+            return []
+        cuts.append((pos, round((pos - layout.audio_start) / average)))
+    return cuts
+
+
+def find_cuts(data, layout: Mp3Layout, times: List[float]) -> List[Tuple[int, int]]:
+    """Byte offset and frame index of the frame boundary closest to each cut time"""
+    if layout.vbr:
+        return _walk_cuts(data, layout, times)
+    return _seek_cuts(data, layout, times)
+
+
+def _tag_frame(data, layout: Mp3Layout, frames: int, size: int) -> bytes:
+    """A Xing (VBR) or Info (CBR) frame describing one part, built on the source's tag frame header.
+
+    The LAME extension is left out: its encoder delay and padding describe the
+    whole file and would make players trim audio from the middle parts.
+    """
+    offset, length = layout.tag_frame
+    header = parse_header(data[offset:offset + 4])
+    frame = bytearray(length)
+    frame[:4] = data[offset:offset + 4]
+    tag = 4 + header.side_info
+    frame[tag:tag + 16] = (b'Xing' if layout.vbr else b'Info') + struct.pack(
+        '>III', XING_FRAMES | XING_BYTES, frames, size + length)
+    return bytes(frame)
+
+
+def probe_mp3(file_path: str) -> Optional[Mp3Layout]:
+    try:
+        with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return read_layout(data)
+    except (OSError, ValueError):
+        return None
+
+
+def split_mp3(file_path: str, cut_times: List[float], output_paths: List[str]) -> bool:
+    """Write len(cut_times) + 1 parts of an MP3 by byte-range copy, without decoding anything.
+
+    Cuts land on the frame boundary nearest each time. Every part gets the
+    source's ID3v2 tag and, when the source has a Xing/Info/VBRI frame, a new
+    Info/Xing frame with the part's own frame and byte counts.
+    """
+    with open(file_path, 'rb') as src, mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        layout = read_layout(data)
+        if layout is None:
+            print(f"Not a parseable MP3: {file_path}")
+            return False
+
+        cuts = find_cuts(data, layout, cut_times)
+        if len(cuts) != len(cut_times):
+            print("Could not find a frame at every cut point")
+            return False
+
+        total_frames = layout.frames or round((layout.audio_end - layout.audio_start) / layout.average_length)
+        bounds = [(layout.audio_start, 0), *cuts, (layout.audio_end, total_frames)]
+        id3 = bytes(data[:layout.tag_end])
+
+        for (start, first_frame), (end, next_frame), output_path in zip(bounds, bounds[1:], output_paths):
+            temp_path = output_path + ".partial"
+            with open(temp_path, 'wb') as dst:
+                dst.write(id3)
+                if layout.tag_frame:
+                    dst.write(_tag_frame(data, layout, max(0, next_frame - first_frame), end - start))
+                dst.flush()
+                copy_range(src.fileno(), dst.fileno(), start, end - start)
+            os.replace(temp_path, output_path)
+    return True
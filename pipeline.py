@@ -0,0 +1,309 @@
+import os
+import copy
+import time
+import queue
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+import tracing
+
+_DONE = object()  # end-of-input marker, one per worker, passed from stage to stage
+
+
+class Stage:
+    """One step of a Pipeline: handler(item) returns the item for the next stage, or None to drop it"""
+
+    def __init__(self, name: str, handler: Callable, workers: int = 1, queue_size: int = 2):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+
+
+class StageStats:
+    def __init__(self):
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.busy = 0  # workers inside the handler right now
+        self.busy_seconds = 0.0
+        self.peak_depth = 0
+
+
+class Pipeline:
+    """Runs items through a chain of stages, each with its own worker threads and bounded input queue.
+
+    A full queue blocks the stage in front of it, so a slow stage holds back
+    the ones feeding it instead of letting finished work pile up. close() lets
+    every stage drain and exit in order; shutdown(cancel=True) drops whatever
+    has not started yet. metrics() reports each queue's depth, which shows
+    which stage is the bottleneck.
+    """
+
+    def __init__(self, stages: List[Stage], on_result: Callable = None,
+                 on_metrics: Callable[[Dict[str, Dict]], None] = None, metrics_interval: float = 1.0):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = stages
+        self.on_result = on_result
+        self.on_metrics = on_metrics
+        self.metrics_interval = metrics_interval
+        self.results = []
+        self.stats = {stage.name: StageStats() for stage in stages}
+        self._queues = [queue.Queue(maxsize=stage.queue_size) for stage in stages]
+        self._running = [stage.workers for stage in stages]
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._closed = False
+        self._threads: List[threading.Thread] = []
+        self._finished = threading.Event()
+
+    def start(self) -> 'Pipeline':
+        for index, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                thread = threading.Thread(target=self._work, args=(index,), name=f"{stage.name}-{n + 1}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        if self.on_metrics or tracing.enabled():
+            threading.Thread(target=self._monitor, name="pipeline-metrics", daemon=True).start()
+        return self
+
+    def _put(self, index: int, item) -> bool:
+        """Blocking put that gives up once the pipeline is cancelled, so no worker hangs on a full queue"""
+        target = self._queues[index]
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=0.2)
+            except queue.Full:
+                continue
+            stats = self.stats[self.stages[index].name]
+            stats.peak_depth = max(stats.peak_depth, target.qsize())
+            return True
+        return False
+
+    def submit(self, item) -> bool:
+        """Queue an item for the first stage, waiting while that queue is full; False once cancelled"""
+        if self._stop.is_set():
+            return False
+        if self._closed:
+            raise RuntimeError("Pipeline is closed")
+        return self._put(0, item)
+
+    def feed(self, items: Iterable) -> int:
+        """Submit every item and close the pipeline, returning how many went in"""
+        count = 0
+        try:
+            for item in items:
+                if not self.submit(item):
+                    break
+                count += 1
+        finally:
+            self.close()
+        return count
+
+    def close(self):
+        """No more input: stages finish what is queued and exit in order"""
+        if not self._closed:
+            self._closed = True
+            for _ in range(self.stages[0].workers):
+                self._queues[0].put(_DONE)
+
+    def _work(self, index: int):
+        try:
+            self._drain(index)
+        finally:
+            # Always pass the end marker on, or join() would wait for this stage forever
+            self._worker_done(index)
+
+    def _drain(self, index: int):
+        stage = self.stages[index]
+        stats = self.stats[stage.name]
+        inbox = self._queues[index]
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                break
+            if self._stop.is_set():
+                continue
+
+            with self._lock:
+                stats.busy += 1
+            started = time.perf_counter()
+            try:
+                result = stage.handler(item)
+            except Exception as e:
+                print(f"Pipeline stage {stage.name} failed: {e}")
+                result = None
+                with self._lock:
+                    stats.failed += 1
+            finally:
+                with self._lock:
+                    stats.busy -= 1
+                    stats.busy_seconds += time.perf_counter() - started
+
+            with self._lock:
+                if result is None:
+                    stats.dropped += 1
+                else:
+                    stats.processed += 1
+            if result is not None:
+                try:
+                    self._forward(index + 1, result)
+                except Exception as e:
+                    print(f"Pipeline stage {stage.name} could not hand on its result: {e}")
+
+    def _forward(self, index: int, item):
+        if index < len(self.stages):
+            self._put(index, item)
+        elif self.on_result:
+            self.on_result(item)
+        else:
+            with self._lock:
+                self.results.append(item)
+
+    def _worker_done(self, index: int):
+        with self._lock:
+            self._running[index] -= 1
+            last = self._running[index] == 0
+        if not last:
+            return
+        if index + 1 < len(self.stages):
+            # Unconditional put: the next stage's workers are alive to take these even after a cancel
+            for _ in range(self.stages[index + 1].workers):
+                self._queues[index + 1].put(_DONE)
+        else:
+            self._finished.set()
+
+    def join(self, timeout: float = None) -> bool:
+        """Wait until the last stage has finished; True if it has"""
+        return self._finished.wait(timeout)
+
+    def shutdown(self, cancel: bool = False, wait: bool = True):
+        """Close the pipeline; with cancel, queued items are dropped and only running handlers finish"""
+        if cancel:
+            self._stop.set()
+        self.close()
+        if wait:
+            self.join()
+
+    def metrics(self) -> Dict[str, Dict]:
+        """Per stage: items waiting in its queue, the most seen at once, workers busy and items handled"""
+        metrics = {}
+        with self._lock:
+            for stage, inbox in zip(self.stages, self._queues):
+                stats = self.stats[stage.name]
+                metrics[stage.name] = {
+                    'queued': inbox.qsize(),
+                    'peak_queued': stats.peak_depth,
+                    'capacity': stage.queue_size,
+                    'workers': stage.workers,
+                    'busy': stats.busy,
+                    'processed': stats.processed,
+                    'dropped': stats.dropped,
+                    'failed': stats.failed,
+                    'busy_seconds': round(stats.busy_seconds, 3),
+                }
+        return metrics
+
+    def _monitor(self):
+        while not self._finished.wait(self.metrics_interval):
+            self._report()
+        self._report()
+
+    def _report(self):
+        metrics = self.metrics()
+        tracing.counter('queue depth', **{name: m['queued'] for name, m in metrics.items()})
+        if self.on_metrics:
+            self.on_metrics(metrics)
+
+
+class PipelineItem:
+    """One URL on its way through the media pipeline"""
+
+    def __init__(self, index: int, url: str):
+        self.index = index  # 1-based, for progress messages
+        self.url = url
+        self.job = None  # MediaJob, once downloaded
+        self.duration = 0.0
+        self.outputs: List[str] = []
+
+
+def media_stages(downloader, processor, audio_only: bool = False, delete_originals: bool = True,
+                 download_workers: int = None, split_workers: int = 1, queue_size: int = 2,
+                 on_downloaded: Callable[[PipelineItem], None] = None,
+                 on_processed: Callable[[PipelineItem], None] = None) -> List[Stage]:
+    """download -> probe -> split -> verify/cleanup, built on VideoDownloader and MediaProcessor"""
+
+    def download(item: PipelineItem) -> Optional[PipelineItem]:
+        item.job = downloader.download_one(item.url, item.index, audio_only)
+        if item.job is None:
+            return None
+        if on_downloaded:
+            on_downloaded(item)
+        return item
+
+    def probe(item: PipelineItem) -> Optional[PipelineItem]:
+        item.duration = processor.probe_job(item.job, audio_only)
+        # A job finished on an earlier run goes on regardless: split returns its recorded parts
+        if item.duration <= 0 and not processor.is_processed(item.job.file_path, audio_only):
+            print(f"Could not get duration of {os.path.basename(item.job.file_path)}")
+            processor.storage.release_path(item.job.file_path)
+            return None
+        return item
+
+    def for_item(item: PipelineItem):
+        """The processor reporting under this item's job id, so concurrent splits keep separate progress"""
+        for_job = getattr(processor.progress_callback, 'for_job', None)
+        if not for_job:
+            return processor
+        worker = copy.copy(processor)
+        worker.progress_callback = for_job(str(item.index))
+        return worker
+
+    def split(item: PipelineItem) -> Optional[PipelineItem]:
+        item.outputs = for_item(item).process_video(item.job, audio_only, delete_original=delete_originals,
+                                                    cleanup=False)
+        return item if item.outputs else None
+
+    def verify(item: PipelineItem) -> Optional[PipelineItem]:
+        if not for_item(item).finish_job(item.job.file_path, audio_only, item.outputs, delete_originals):
+            return None
+        if on_processed:
+            on_processed(item)
+        return item
+
+    return [
+        Stage('download', download, download_workers or downloader.max_concurrent, queue_size),
+        Stage('probe', probe, 1, queue_size),
+        Stage('split', split, split_workers, queue_size),
+        Stage('verify', verify, 1, queue_size),
+    ]
+
+
+def run_media_pipeline(downloader, processor, urls: Iterable[str], audio_only: bool = False,
+                       delete_originals: bool = True, split_workers: int = 1,
+                       on_metrics: Callable[[Dict[str, Dict]], None] = None,
+                       on_result: Callable[[PipelineItem], None] = None, expand: bool = True,
+                       **hooks) -> List[PipelineItem]:
+    """Download, probe, split and clean up every url with all four stages running at once.
+
+    urls is read lazily, with playlists and channels expanded page by page
+    (see VideoDownloader.expand_urls), only as fast as the download queue
+    takes them. Returns the items that made it through, in url order; each
+    carries its MediaJob and output parts. With on_result each finished item
+    goes there instead and nothing is kept, so memory stays flat for any
+    number of URLs. hooks are passed to media_stages().
+    """
+    downloader.total_files = 0
+    pipeline = Pipeline(media_stages(downloader, processor, audio_only, delete_originals,
+                                     split_workers=split_workers, **hooks),
+                        on_result=on_result, on_metrics=on_metrics).start()
+    try:
+        pipeline.feed(PipelineItem(i + 1, url) for i, url in enumerate(downloader.expand_urls(urls, expand)))
+        pipeline.join()
+    except BaseException:
+        pipeline.shutdown(cancel=True)
+        raise
+    for name, stage in pipeline.metrics().items():
+        print(f"Stage {name}: {stage['processed']} done, {stage['dropped']} dropped, "
+              f"peak queue {stage['peak_queued']}/{stage['capacity']}, busy {stage['busy_seconds']:.1f}s")
+    return sorted(pipeline.results, key=lambda item: item.index)
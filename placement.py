@@ -0,0 +1,95 @@
+import os
+import sys
+from typing import Optional
+
+COPY_CHUNK = 64 * 1024 * 1024
+FICLONE = 0x40049409  # linux/fs.h: _IOW(0x94, 9, int)
+
+
+def copy_range(src_fd: int, dst_fd: int, offset: int, count: int):
+    """Copy count bytes from offset in src to the current position of dst without a userspace buffer where possible"""
+    end = offset + count
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while offset < end:
+                copied = os.copy_file_range(src_fd, dst_fd, min(COPY_CHUNK, end - offset), offset)
+                if copied == 0:
+                    break
+                offset += copied
+            if offset >= end:
+                return
+        except OSError:
+            pass  # e.g. EXDEV on older kernels or an unsupported filesystem
+    if hasattr(os, 'sendfile'):
+        try:
+            while offset < end:
+                copied = os.sendfile(dst_fd, src_fd, offset, min(COPY_CHUNK, end - offset))
+                if copied == 0:
+                    break
+                offset += copied
+            if offset >= end:
+                return
+        except OSError:
+            pass
+    os.lseek(src_fd, offset, os.SEEK_SET)
+    while offset < end:
+        chunk = os.read(src_fd, min(COPY_CHUNK, end - offset))
+        if not chunk:
+            raise OSError(f"Unexpected end of file at byte {offset}")
+        os.write(dst_fd, chunk)
+        offset += len(chunk)
+
+
+def _reflink(src_path: str, dst_path: str) -> bool:
+    """Share the source's extents copy-on-write (Btrfs, XFS, bcachefs); False where unsupported"""
+    if not sys.platform.startswith('linux'):
+        return False
+    import fcntl
+    try:
+        with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError:
+        if os.path.exists(dst_path):
+            os.remove(dst_path)
+        return False
+
+
+def place_file(src_path: str, dst_path: str, move: bool = False) -> Optional[str]:
+    """Put the bytes of src_path at dst_path as cheaply as the filesystem allows.
+
+    Tries an atomic rename (only when move is set), then a hardlink, then a
+    reflink, then an in-kernel copy. Returns the method that worked, or None
+    if every one failed. With move set the source is gone afterwards.
+    """
+    if move:
+        try:
+            os.replace(src_path, dst_path)
+            return "rename"
+        except OSError:
+            pass  # e.g. EXDEV: the output folder is on another filesystem
+
+    temp_path = dst_path + ".partial"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    try:
+        os.link(src_path, temp_path)
+        method = "hardlink"
+    except OSError:
+        if _reflink(src_path, temp_path):
+            method = "reflink"
+        else:
+            try:
+                with open(src_path, 'rb') as src, open(temp_path, 'wb') as dst:
+                    copy_range(src.fileno(), dst.fileno(), 0, os.fstat(src.fileno()).st_size)
+                method = "copy"
+            except OSError as e:
+                print(f"Could not copy {src_path}: {e}")
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                return None
+
+    os.replace(temp_path, dst_path)
+    if move:
+        os.remove(src_path)
+    return method
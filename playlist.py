@@ -0,0 +1,75 @@
+from typing import Callable, Iterable, Iterator, Optional
+
+# Extractor names that hold other videos rather than being one (youtube:tab, youtube:playlist, ...)
+COLLECTION_WORDS = ("playlist", "tab", "channel", "user", "album", "collection", "series", "show")
+
+
+def is_collection_extractor(name: str) -> bool:
+    name = (name or "").lower()
+    return any(word in name for word in COLLECTION_WORDS)
+
+
+class PlaylistExpander:
+    """Turns a stream of URLs into a stream of video URLs, expanding playlists and channels lazily.
+
+    extract(url) returns a yt-dlp style info dict; a collection has an
+    'entries' iterable of 'url' entries or nested playlists. Any callable
+    will do, so a local fake extractor can stand in for yt-dlp. Nothing is
+    collected: each video URL is yielded as soon as its page is read, and
+    memory stays the same however long the playlist is.
+    """
+
+    MAX_DEPTH = 3  # channel -> tab -> playlist
+
+    def __init__(self, extract: Callable[[str], Optional[dict]],
+                 is_collection: Callable[[str], bool] = None):
+        self.extract = extract
+        self.is_collection = is_collection or (lambda url: True)
+
+    def _is_collection_entry(self, entry: dict, url: str) -> bool:
+        # Flat entries usually name their extractor, which saves matching the URL against all of them
+        if entry.get('ie_key'):
+            return is_collection_extractor(entry['ie_key'])
+        return self.is_collection(url)
+
+    def _entries(self, info: dict, depth: int) -> Iterator[str]:
+        for entry in info.get('entries') or ():
+            if not entry:
+                continue  # unavailable or private entries come back as None
+            if entry.get('_type') == 'playlist':
+                yield from self._entries(entry, depth + 1)
+                continue
+            url = entry.get('url') or entry.get('webpage_url')
+            if not url:
+                continue
+            if entry.get('_type') in ('url', 'url_transparent') and depth < self.MAX_DEPTH \
+                    and self._is_collection_entry(entry, url):
+                yield from self._expand(url, depth + 1)
+            else:
+                yield url
+
+    def _expand(self, url: str, depth: int) -> Iterator[str]:
+        try:
+            info = self.extract(url)
+        except Exception as e:
+            print(f"Could not expand {url}: {e}")
+            return
+        if not info:
+            print(f"Could not expand {url}")
+            return
+        if info.get('_type') not in ('playlist', 'multi_video'):
+            yield url
+            return
+        print(f"Expanding {info.get('_type')}: {info.get('title') or url}")
+        try:
+            yield from self._entries(info, depth)
+        except Exception as e:
+            # A later page failed to load; the entries already yielded stand
+            print(f"Stopped expanding {url}: {e}")
+
+    def expand(self, urls: Iterable[str]) -> Iterator[str]:
+        for url in urls:
+            if self.is_collection(url):
+                yield from self._expand(url, 0)
+            else:
+                yield url
@@ -0,0 +1,105 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Optional
+
+# Stream fields worth keeping; the rest of ffprobe's output is never read
+STREAM_FIELDS = (
+    'index', 'codec_type', 'codec_name', 'profile', 'pix_fmt', 'width', 'height',
+    'sample_rate', 'channels', 'bit_rate', 'duration',
+)
+
+
+def summarize_probe(data: dict) -> dict:
+    """Reduce ffprobe -show_format -show_streams JSON to what MediaProcessor uses"""
+    fmt = data.get('format', {})
+    streams = [
+        {key: stream[key] for key in STREAM_FIELDS if key in stream}
+        for stream in data.get('streams', [])
+    ]
+    return {
+        'duration': float(fmt.get('duration') or 0),
+        'bit_rate': int(fmt.get('bit_rate') or 0),
+        'format_name': fmt.get('format_name', ''),
+        'size': int(fmt.get('size') or 0),
+        'streams': streams,
+        'codecs': [stream.get('codec_name') for stream in streams],
+    }
+
+
+class ProbeCache:
+    """Persistent ffprobe results keyed by file identity (path, size, mtime_ns), evicted least recently used"""
+
+    def __init__(self, db_path: str, max_entries: int = 5000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._initialized:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS probes ("
+                " path TEXT NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+                " data TEXT NOT NULL, last_used REAL NOT NULL,"
+                " PRIMARY KEY (path, size, mtime_ns))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS probes_last_used ON probes (last_used)")
+            self._initialized = True
+        return conn
+
+    @staticmethod
+    def _identity(file_path: str):
+        stat = os.stat(file_path)
+        return os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns
+
+    def get(self, file_path: str) -> Optional[dict]:
+        try:
+            key = self._identity(file_path)
+            with self._lock:
+                conn = self._connect()
+                try:
+                    with conn:
+                        row = conn.execute(
+                            "SELECT data FROM probes WHERE path = ? AND size = ? AND mtime_ns = ?", key
+                        ).fetchone()
+                        if row is None:
+                            return None
+                        conn.execute(
+                            "UPDATE probes SET last_used = ? WHERE path = ? AND size = ? AND mtime_ns = ?",
+                            (time.time(), *key)
+                        )
+                finally:
+                    conn.close()
+            return json.loads(row[0])
+        except (OSError, sqlite3.Error, ValueError) as e:
+            print(f"Probe cache read failed: {e}")
+            return None
+
+    def put(self, file_path: str, probe: dict):
+        try:
+            key = self._identity(file_path)
+            with self._lock:
+                conn = self._connect()
+                try:
+                    with conn:
+                        # An older identity of the same path can never be hit again
+                        conn.execute("DELETE FROM probes WHERE path = ?", (key[0],))
+                        conn.execute(
+                            "INSERT INTO probes (path, size, mtime_ns, data, last_used) VALUES (?, ?, ?, ?, ?)",
+                            (*key, json.dumps(probe), time.time())
+                        )
+                        conn.execute(
+                            "DELETE FROM probes WHERE rowid IN ("
+                            " SELECT rowid FROM probes ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                            (self.max_entries,)
+                        )
+                finally:
+                    conn.close()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Probe cache write failed: {e}")
@@ -1,106 +1,207 @@
 import os
+import copy
 import subprocess
+import csv
 import math
-import sys
-from typing import List, Callable
-
-# Windows-specific configuration to hide console windows
-if sys.platform == "win32":
-    import subprocess
-    startupinfo = subprocess.STARTUPINFO()
-    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-    startupinfo.wShowWindow = subprocess.SW_HIDE
-    subprocess_kwargs = {
-        'startupinfo': startupinfo,
-        'creationflags': subprocess.CREATE_NO_WINDOW
-    }
-else:
-    subprocess_kwargs = {}
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Callable, Iterable, Union
+from keyframes import KeyframeIndex, PlannedPart, load_keyframe_index, nominal_boundaries, plan_cuts
+from probe_cache import ProbeCache, summarize_probe
+from media_job import MediaJob, job_path
+from toolchain import get_toolchain, subprocess_kwargs
+from ffmpeg_progress import FFmpegProgress, FFmpegResult, concat_quote, run_ffmpeg
+from journal import JobState, get_journal, process_key
+from manifest import OutputManifest, fingerprint
+from throughput import ThroughputModel, WeightedProgress, get_throughput_model
+from tracing import annotate, traced
+from mp3_split import probe_mp3, split_mp3
+from placement import place_file
+from storage import get_storage_budget
 
 class MediaProcessor:
     SEGMENT_LENGTH = 2700
+    KEYFRAME_TOLERANCE = 2.0
+    X264_PROFILES = {"baseline": "baseline", "constrained baseline": "baseline", "main": "main", "high": "high"}
+    SPLIT_MODES = ("single_pass", "per_part")
+    MP3_BITRATE = 128  # kbit/s of every MP3 part
+    SMART_RENDER_WINDOW = 20.0  # seconds past a cut searched for the keyframe that ends the re-encoded head
+    STAGING_PREFIX = ".split45_"
+    STALE_STAGING_SECONDS = 3600  # a staging dir untouched this long was left by a run that crashed
 
-    def __init__(self, progress_callback: Callable[[str, float], None] = None, output_folder: str = None):
+    def __init__(self, progress_callback: Callable[[str, float], None] = None, output_folder: str = None,
+                 split_mode: str = "single_pass", parallel_encode: bool = False, encode_workers: int = None,
+                 throughput: ThroughputModel = None):
+        if split_mode not in self.SPLIT_MODES:
+            raise ValueError(f"Unknown split mode: {split_mode}")
         self.progress_callback = progress_callback
         self.output_folder = output_folder or os.getcwd()
+        self.split_mode = split_mode
+        self.parallel_encode = parallel_encode
+        self.encode_workers = encode_workers or os.cpu_count() or 1
         self.downloads_folder = os.path.join(self.output_folder, "downloads")
         self.min45_folder = os.path.join(self.output_folder, "45min")
         self.remainder_folder = os.path.join(self.output_folder, "remainder")
+        self.cache_folder = os.path.join(self.output_folder, ".split45_cache")
+        self.probe_cache = ProbeCache(os.path.join(self.cache_folder, "probe_cache.sqlite3"))
+        self.manifest = OutputManifest(os.path.join(self.cache_folder, "manifest.sqlite3"))
+        self.journal = get_journal(self.output_folder)
+        self.throughput = throughput or get_throughput_model()
+        self.storage = get_storage_budget(self.output_folder)
         
-        self.ffmpeg_path = self._find_ffmpeg()
-        self.ffprobe_path = self._find_ffprobe()
+        self.toolchain = get_toolchain()
+        self.ffmpeg_path = self.toolchain.ffmpeg_path
+        self.ffprobe_path = self.toolchain.ffprobe_path
         
         print(f"MediaProcessor initialized with FFmpeg: {self.ffmpeg_path}")
         print(f"Output folders will be created in: {self.output_folder}")
+        self._sweep_staging()
 
-    def _find_ffmpeg(self):
-        bundled_path = os.path.join(os.path.dirname(__file__), "ffmpeg", "ffmpeg.exe")
-        if os.path.exists(bundled_path):
-            return bundled_path
-        
-        try:
-            result = subprocess.run(['where', 'ffmpeg'], capture_output=True, text=True, shell=True, **subprocess_kwargs)
-            if result.returncode == 0:
-                return result.stdout.strip().split('\n')[0]
-        except:
-            pass
-        
-        return "ffmpeg"
+    def _sweep_staging(self):
+        """Remove staging dirs that a crashed run left behind in the output folder.
 
-    def _find_ffprobe(self):
-        bundled_path = os.path.join(os.path.dirname(__file__), "ffmpeg", "ffprobe.exe")
-        if os.path.exists(bundled_path):
-            return bundled_path
-        
+        Only dirs with nothing written for STALE_STAGING_SECONDS go, so the
+        staging of another run on the same folder is left alone.
+        """
         try:
-            result = subprocess.run(['where', 'ffprobe'], capture_output=True, text=True, shell=True, **subprocess_kwargs)
-            if result.returncode == 0:
-                return result.stdout.strip().split('\n')[0]
-        except:
-            pass
-        
-        return "ffprobe"
+            names = os.listdir(self.output_folder)
+        except OSError:
+            return
+        now = time.time()
+        for name in names:
+            path = os.path.join(self.output_folder, name)
+            if not name.startswith(self.STAGING_PREFIX) or path == self.cache_folder or not os.path.isdir(path):
+                continue
+            try:
+                touched = max([os.path.getmtime(path)] +
+                              [os.path.getmtime(os.path.join(path, entry)) for entry in os.listdir(path)])
+            except OSError:
+                continue
+            if now - touched >= self.STALE_STAGING_SECONDS:
+                print(f"Removing leftover staging folder: {name}")
+                shutil.rmtree(path, ignore_errors=True)
 
     def _create_output_dirs(self):
         os.makedirs(self.min45_folder, exist_ok=True)
         os.makedirs(self.remainder_folder, exist_ok=True)
 
+    def _mp3_args(self) -> List[str]:
+        return ['-acodec', self.toolchain.mp3_encoder, '-ab', f'{self.MP3_BITRATE}k']
+
+    def _is_target_mp3(self, file_path: str) -> bool:
+        """Whether the input is already MP3 at the part bitrate, so parts can be copied instead of re-encoded"""
+        bitrate = 0.0
+        layout = probe_mp3(file_path) if file_path.lower().endswith('.mp3') else None
+        if layout:
+            bitrate = layout.bitrate
+        else:
+            probe = self._probe(file_path)
+            streams = [stream for stream in probe.get('streams', []) if stream.get('codec_type') == 'audio']
+            if not streams or streams[0].get('codec_name') != 'mp3':
+                return False
+            bitrate = float(streams[0].get('bit_rate') or probe.get('bit_rate') or 0) / 1000
+        # Within 10%: VBR averages and container overhead never land exactly on the nominal rate
+        return abs(bitrate - self.MP3_BITRATE) <= self.MP3_BITRATE * 0.1
+
+    def _audio_args(self, file_path: str) -> List[str]:
+        """MP3 output args for a file: a copy if it is already MP3 at the part bitrate, else one encode"""
+        if self._is_target_mp3(file_path):
+            return ['-vn', '-c:a', 'copy']
+        return ['-vn', *self._mp3_args()]
+
     def _get_base_name(self, file_path: str) -> str:
         return os.path.splitext(os.path.basename(file_path))[0]
 
+    def _get_unique_base_names(self, file_paths: List[Union[str, MediaJob]]) -> List[str]:
+        """Base names for a batch, with the extension appended where two inputs would write the same parts"""
+        base_names = []
+        seen = set()
+        for file_path in map(job_path, file_paths):
+            base_name = self._get_base_name(file_path)
+            if base_name.lower() in seen:
+                extension = os.path.splitext(file_path)[1].lstrip('.')
+                candidate = f"{base_name}_{extension}" if extension else base_name
+                counter = 2
+                while candidate.lower() in seen:
+                    candidate = f"{base_name}_{extension}{counter}" if extension else f"{base_name}_{counter}"
+                    counter += 1
+                base_name = candidate
+            seen.add(base_name.lower())
+            base_names.append(base_name)
+        return base_names
+
     def _get_output_path(self, base_name: str, part: int, is_full: bool, extension: str) -> str:
         folder = self.min45_folder if is_full else self.remainder_folder
         return os.path.join(folder, f"{base_name}_part{part}{extension}")
 
-    def _get_video_duration(self, file_path: str) -> float:
+    @traced("ffprobe")
+    def _probe(self, file_path: str, refresh: bool = False) -> dict:
+        """Duration, bitrate and stream/codec info for file_path, from the probe cache when it is current"""
+        cached = None if refresh else self.probe_cache.get(file_path)
+        annotate(path=file_path, cached=cached is not None)
+        if cached is not None:
+            return cached
+
         try:
             cmd = [
-                self.ffprobe_path, '-v', 'quiet', '-print_format', 'json', '-show_format', file_path
+                self.ffprobe_path, '-v', 'quiet', '-print_format', 'json', '-show_format', '-show_streams', file_path
             ]
             
             result = subprocess.run(cmd, capture_output=True, text=True, timeout=30, **subprocess_kwargs)
             
             if result.returncode != 0:
                 print(f"FFprobe error: {result.stderr}")
-                return 0
+                return {}
             
             import json
-            data = json.loads(result.stdout)
-            duration = float(data['format']['duration'])
-            return duration
+            probe = summarize_probe(json.loads(result.stdout))
+            if probe['duration'] > 0:
+                self.probe_cache.put(file_path, probe)
+            return probe
             
+        except Exception as e:
+            print(f"Error probing file: {e}")
+            return {}
+
+    @traced("get_video_duration")
+    def _get_video_duration(self, file_path: str) -> float:
+        try:
+            if file_path.lower().endswith('.mp3'):
+                # Frame headers give the duration without starting ffprobe
+                layout = probe_mp3(file_path)
+                if layout and layout.duration > 0:
+                    annotate(duration=layout.duration, source='mp3 frames')
+                    return layout.duration
+            duration = float(self._probe(file_path).get('duration', 0))
+            annotate(duration=duration)
+            return duration
         except Exception as e:
             print(f"Error getting duration: {e}")
             return 0
 
-    def _copy_short_video(self, file_path: str, audio_only: bool = False) -> str:
-        base_name = self._get_base_name(file_path)
+    @traced("ffmpeg")
+    def _run_ffmpeg(self, cmd: List[str], duration: float = 0,
+                    report: Callable[[FFmpegProgress], None] = None) -> FFmpegResult:
+        """Run ffmpeg with live -progress parsing and a bounded stderr tail"""
+        print(f"Running: {' '.join(cmd)}")
+        result = run_ffmpeg(cmd, duration, report, machine_progress=self.toolchain.supports_progress)
+        output_path = cmd[-1]
+        annotate(output=output_path, returncode=result.returncode, media_seconds=duration,
+                 bytes_written=os.path.getsize(output_path) if os.path.isfile(output_path) else 0)
+        return result
+
+    @traced("copy_short_video")
+    def _copy_short_video(self, file_path: str, audio_only: bool = False, base_name: str = None,
+                          duration: float = 0) -> str:
+        base_name = base_name or self._get_base_name(file_path)
         
         if audio_only:
             output_path = os.path.join(self.remainder_folder, f"{base_name}.mp3")
             cmd = [
                 self.ffmpeg_path, '-i', file_path,
-                '-acodec', 'mp3', '-ab', '128k',
+                *self._audio_args(file_path),
                 '-y', output_path
             ]
         else:
@@ -111,57 +212,488 @@ class MediaProcessor:
                 '-y', output_path
             ]
         
-        print(f"Running: {' '.join(cmd)}")
-        result = subprocess.run(cmd, capture_output=True, text=True, **subprocess_kwargs)
+        def report(progress: FFmpegProgress):
+            if self.progress_callback:
+                self.progress_callback(f"Copying short video to remainder folder: {progress.describe()}",
+                                       progress.percent)
+
+        result = self._run_ffmpeg(cmd, duration, report)
         
         if result.returncode == 0:
+            annotate(output=output_path, bytes_written=os.path.getsize(output_path))
             return output_path
         else:
             print(f"FFmpeg error: {result.stderr}")
             return ""
 
-    def _split_video_ffmpeg(self, file_path: str, start_time: int, duration: int, output_path: str, audio_only: bool = False):
+    def _needs_conversion(self, file_path: str, audio_only: bool) -> bool:
+        """Whether a short input must go through FFmpeg to end up as the .mp3/.mp4 the folders hold"""
+        if audio_only:
+            return not (file_path.lower().endswith('.mp3') and self._is_target_mp3(file_path))
+        if not file_path.lower().endswith('.mp4'):
+            return True
+        format_name = self._probe(file_path).get('format_name', '')
+        return bool(format_name) and 'mp4' not in format_name
+
+    @traced("place_short_file")
+    def _place_short_file(self, file_path: str, audio_only: bool = False, base_name: str = None,
+                          duration: float = 0, move: bool = False) -> str:
+        """Put a short input into remainder/ by rename, hardlink, reflink or in-kernel copy; FFmpeg only to convert"""
+        if self._needs_conversion(file_path, audio_only):
+            return self._copy_short_video(file_path, audio_only, base_name, duration)
+
+        base_name = base_name or self._get_base_name(file_path)
+        output_path = os.path.join(self.remainder_folder, f"{base_name}{'.mp3' if audio_only else '.mp4'}")
+        if os.path.abspath(output_path) == os.path.abspath(file_path):
+            return output_path
+
+        method = place_file(file_path, output_path, move)
+        if method is None:
+            return self._copy_short_video(file_path, audio_only, base_name, duration)
+        annotate(method=method, output=output_path)
+        print(f"Placed short file by {method}: {output_path}")
+        return output_path
+
+    def _is_full_part(self, index: int, count: int, part: PlannedPart) -> bool:
+        return index < count - 1 or (part.end - part.start) >= self.SEGMENT_LENGTH - 1
+
+    def _load_keyframes(self, file_path: str, duration: float) -> KeyframeIndex:
+        """Keyframes around each nominal cut: within tolerance for snapping, and the next GOP for smart render"""
+        return load_keyframe_index(self.ffprobe_path, file_path, os.path.join(self.cache_folder, "keyframes"),
+                                   nominal_boundaries(duration, self.SEGMENT_LENGTH),
+                                   before=self.KEYFRAME_TOLERANCE + 1, after=self.SMART_RENDER_WINDOW)
+
+    def _get_video_stream_info(self, file_path: str) -> dict:
+        for stream in self._probe(file_path).get('streams', []):
+            if stream.get('codec_type') == 'video':
+                return stream
+        return {}
+
+    @traced("smart_render_part")
+    def _smart_render_part(self, file_path: str, start_time: float, duration: float, output_path: str,
+                           keyframes: KeyframeIndex, report: Callable[[FFmpegProgress], None] = None) -> bool:
+        """Re-encode only the GOP before the first keyframe of the part and stream-copy the rest"""
+        end_time = start_time + duration
+        keyframe = keyframes.next_at_or_after(start_time)
+        if keyframe is None or keyframe >= end_time:
+            return False
+        if keyframe - start_time > self.SMART_RENDER_WINDOW:
+            # The index only covers a window past each cut; a keyframe beyond it belongs to the next
+            # cut's window, and re-encoding up to there would be nearly the whole part
+            print(f"No keyframe within {self.SMART_RENDER_WINDOW:.0f}s of the cut, skipping smart render")
+            return False
+
+        stream = self._get_video_stream_info(file_path)
+        if stream and 'profile' not in stream:
+            # Download metadata has no codec profile; this rare path pays for a real probe
+            stream = next((s for s in self._probe(file_path, refresh=True).get('streams', [])
+                           if s.get('codec_type') == 'video'), {})
+        profile = self.X264_PROFILES.get(str(stream.get('profile', '')).lower())
+        if stream.get('codec_name') != 'h264' or not profile:
+            print("Smart render needs an H.264 input, skipping")
+            return False
+        if not self.toolchain.has_encoder('libx264'):
+            print("Smart render needs the libx264 encoder, skipping")
+            return False
+
+        staging_dir = tempfile.mkdtemp(prefix=self.STAGING_PREFIX, dir=self.output_folder)
+        # MPEG-TS intermediates carry SPS/PPS in-band (Annex B), so the tail keeps decoding with its own
+        # parameter sets after the head's; MP4 pieces would share the head's avcC and corrupt the tail
+        head_path = os.path.join(staging_dir, "head.ts")
+        tail_path = os.path.join(staging_dir, "tail.ts")
+        list_path = os.path.join(staging_dir, "concat.txt")
+
+        # ADTS AAC from the .ts pieces has to be turned back into MP4's raw AAC
+        audio_bsf = ['-bsf:a', 'aac_adtstoasc'] if 'aac' in self._probe(file_path).get('codecs', []) else []
+        commands = [
+            [
+                self.ffmpeg_path, '-ss', str(start_time), '-i', file_path,
+                '-t', str(keyframe - start_time),
+                '-c:v', 'libx264', '-preset', 'ultrafast', '-profile:v', profile,
+                '-pix_fmt', stream.get('pix_fmt', 'yuv420p'),
+                '-c:a', 'copy', '-f', 'mpegts',
+                '-y', head_path
+            ],
+            [
+                self.ffmpeg_path, '-ss', str(keyframe), '-i', file_path,
+                '-t', str(end_time - keyframe),
+                '-c', 'copy', '-bsf:v', 'h264_mp4toannexb', '-avoid_negative_ts', 'make_zero', '-f', 'mpegts',
+                '-y', tail_path
+            ],
+            [
+                self.ffmpeg_path, '-f', 'concat', '-safe', '0', '-i', list_path,
+                '-c', 'copy', *audio_bsf,
+                '-y', output_path
+            ],
+        ]
+
+        try:
+            with open(list_path, 'w', encoding='utf-8') as f:
+                f.write(f"file {concat_quote(head_path)}\nfile {concat_quote(tail_path)}\n")
+
+            print(f"Smart render: re-encoding {keyframe - start_time:.2f}s up to keyframe at {keyframe:.2f}s")
+            head_cmd, tail_cmd, concat_cmd = commands
+            for cmd, cmd_duration, cmd_report in ((head_cmd, keyframe - start_time, None),
+                                                  (tail_cmd, end_time - keyframe, report),
+                                                  (concat_cmd, duration, None)):
+                result = self._run_ffmpeg(cmd, cmd_duration, cmd_report)
+                if result.returncode != 0:
+                    print(f"FFmpeg error: {result.stderr}")
+                    return False
+            if not self._decodes_cleanly(output_path, keyframe - start_time):
+                print("Smart-rendered part does not decode cleanly across the seam, discarding it")
+                os.remove(output_path)
+                return False
+            return True
+
+        except Exception as e:
+            print(f"Error during smart render: {e}")
+            return False
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    @traced("decode_check")
+    def _decodes_cleanly(self, file_path: str, seam: float, margin: float = 2.0) -> bool:
+        """Decode the video from the start of the part to a little past the seam, failing on any error"""
+        cmd = [
+            self.ffmpeg_path, '-v', 'error', '-xerror', '-i', file_path,
+            '-t', str(seam + margin), '-map', '0:v:0', '-f', 'null', '-'
+        ]
         try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300, **subprocess_kwargs)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"Could not run decode check: {e}")
+            return False
+        if result.returncode != 0 or result.stderr.strip():
+            print(f"Decode check failed: {result.stderr.strip()[:500]}")
+            return False
+        return True
+
+    @traced("split_part")
+    def _split_video_ffmpeg(self, file_path: str, start_time: float, duration: float, output_path: str,
+                            audio_only: bool = False, keyframes: KeyframeIndex = None,
+                            report: Callable[[FFmpegProgress], None] = None):
+        try:
+            if not audio_only and keyframes and start_time > 0 and not keyframes.is_keyframe(start_time):
+                if self._smart_render_part(file_path, start_time, duration, output_path, keyframes, report):
+                    return True
+                print("Smart render failed, falling back to stream copy...")
+
             if audio_only:
                 cmd = [
-                    self.ffmpeg_path, '-i', file_path, 
-                    '-ss', str(start_time), '-t', str(duration),
-                    '-acodec', 'mp3', '-ab', '128k',
+                    self.ffmpeg_path, '-ss', str(start_time), '-i', file_path,
+                    '-t', str(duration),
+                    *self._audio_args(file_path),
                     '-y', output_path
                 ]
             else:
                 cmd = [
-                    self.ffmpeg_path, '-i', file_path,
-                    '-ss', str(start_time), '-t', str(duration),
+                    self.ffmpeg_path, '-ss', str(start_time), '-i', file_path,
+                    '-t', str(duration),
                     '-c', 'copy',
                     '-y', output_path
                 ]
             
-            print(f"Running: {' '.join(cmd)}")
-            result = subprocess.run(cmd, capture_output=True, text=True, **subprocess_kwargs)
+            result = self._run_ffmpeg(cmd, duration, report)
             
             if result.returncode != 0:
                 print(f"FFmpeg error: {result.stderr}")
-                if not audio_only and '-c copy' in cmd:
+                if not audio_only:
                     print("Stream copy failed, trying with re-encoding...")
+                    video_args = ['-c:v', 'libx264', '-preset', 'ultrafast']
+                    if not self.toolchain.has_encoder('libx264'):
+                        video_args = ['-c:v', 'mpeg4', '-q:v', '5']
                     cmd = [
-                        self.ffmpeg_path, '-i', file_path,
-                        '-ss', str(start_time), '-t', str(duration),
-                        '-c:v', 'libx264', '-preset', 'ultrafast',
+                        self.ffmpeg_path, '-ss', str(start_time), '-i', file_path,
+                        '-t', str(duration),
+                        *video_args,
                         '-c:a', 'aac', '-b:a', '128k',
                         '-y', output_path
                     ]
-                    result = subprocess.run(cmd, capture_output=True, text=True, **subprocess_kwargs)
-            
+                    result = self._run_ffmpeg(cmd, duration, report)
+
+            annotate(output=output_path, start=start_time, media_seconds=duration,
+                     bytes_written=os.path.getsize(output_path) if os.path.isfile(output_path) else 0)
             return result.returncode == 0
             
         except Exception as e:
             print(f"Error splitting with ffmpeg: {e}")
             return False
 
+    def _record_part(self, job_key: str, index: int, path: str):
+        if job_key:
+            self.journal.record(job_key, 'part', index=index, path=path, size=os.path.getsize(path))
+
+    def _split_per_part(self, file_path: str, parts: List[PlannedPart], base_name: str, extension: str,
+                        audio_only: bool, output_files: List[str], keyframes: KeyframeIndex = None,
+                        workers: int = 1, job_key: str = None, done_parts: Dict[int, str] = None) -> int:
+        num_segments = len(parts)
+        output_paths = [
+            self._get_output_path(base_name, i + 1, self._is_full_part(i, num_segments, part), extension)
+            for i, part in enumerate(parts)
+        ]
+
+        def write_part(i: int, live_progress: bool = False) -> bool:
+            part = parts[i]
+            print(f"Creating segment {i+1}/{num_segments} ({part.start/60:.1f}-{part.end/60:.1f} min)")
+            print(f"Writing segment to: {output_paths[i]}")
+            print("Processing with FFmpeg...")
+
+            def report(progress: FFmpegProgress):
+                if self.progress_callback:
+                    self.progress_callback(f"Processing segment {i+1}/{num_segments}: {progress.describe()}",
+                                           ((i + progress.percent / 100) / num_segments) * 100)
+
+            success = self._split_video_ffmpeg(file_path, part.start, part.end - part.start, output_paths[i],
+                                               audio_only, keyframes, report if live_progress else None)
+            if success and os.path.exists(output_paths[i]):
+                self._record_part(job_key, i + 1, output_paths[i])
+                return True
+            return False
+
+        done_parts = done_parts or {}
+        succeeded = [done_parts.get(i + 1) == output_paths[i] for i in range(num_segments)]
+        completed = sum(succeeded)
+        if completed:
+            print(f"Resuming: {completed}/{num_segments} segments already written and verified")
+        pending = [i for i in range(num_segments) if not succeeded[i]]
+
+        def report(i: int):
+            if succeeded[i]:
+                print(f"Completed segment {i+1}/{num_segments} in seconds (not minutes!)")
+            else:
+                print(f"Failed to create segment {i+1}")
+            if self.progress_callback:
+                self.progress_callback(f"FFmpeg completed segment {i+1}/{num_segments}",
+                                       (completed / num_segments) * 100)
+
+        if workers > 1:
+            print(f"Encoding {num_segments} segments with {workers} parallel workers")
+            if self.progress_callback:
+                self.progress_callback(f"Processing segments 1-{num_segments}/{num_segments} in parallel", 0)
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(write_part, i): i for i in pending}
+                for future in as_completed(futures):
+                    i = futures[future]
+                    try:
+                        succeeded[i] = future.result()
+                    except Exception as e:
+                        print(f"Error creating segment {i+1}: {e}")
+                    completed += 1
+                    report(i)
+        else:
+            for i in pending:
+                if self.progress_callback:
+                    self.progress_callback(f"Processing segment {i+1}/{num_segments}",
+                                         (i / num_segments) * 100)
+                succeeded[i] = write_part(i, live_progress=True)
+                completed += 1
+                report(i)
+
+        output_files.extend(path for path, ok in zip(output_paths, succeeded) if ok)
+        return sum(succeeded)
+
+    @traced("split_single_pass")
+    def _split_single_pass(self, file_path: str, base_name: str, extension: str,
+                           parts: List[PlannedPart], audio_only: bool = False, job_key: str = None) -> List[str]:
+        """Write every part from one read of the input using FFmpeg's segment muxer"""
+        staging_dir = tempfile.mkdtemp(prefix=self.STAGING_PREFIX, dir=self.output_folder)
+        segment_list = os.path.join(staging_dir, "segments.csv")
+        pattern = os.path.join(staging_dir, f"part%d{extension}")
+
+        if audio_only:
+            codec_args = self._audio_args(file_path)
+        else:
+            codec_args = ['-c', 'copy']
+
+        cmd = [
+            self.ffmpeg_path, '-i', file_path,
+            *codec_args,
+            '-f', 'segment', '-segment_times', ','.join(str(part.start) for part in parts[1:]),
+            '-segment_start_number', '1', '-reset_timestamps', '1',
+            '-segment_list', segment_list, '-segment_list_type', 'csv',
+            '-y', pattern
+        ]
+
+        try:
+            if self.progress_callback:
+                self.progress_callback(f"Splitting into {len(parts)} segments in a single pass...", 20)
+
+            def report(progress: FFmpegProgress):
+                if self.progress_callback:
+                    self.progress_callback(f"Splitting into {len(parts)} segments: {progress.describe()}",
+                                           progress.percent)
+
+            result = self._run_ffmpeg(cmd, parts[-1].end, report)
+
+            if result.returncode != 0 or not os.path.exists(segment_list):
+                print(f"FFmpeg error: {result.stderr}")
+                return []
+
+            with open(segment_list, newline='') as f:
+                entries = [row for row in csv.reader(f) if row]
+
+            output_files = []
+            for i, (name, start, end) in enumerate(entries):
+                staged_path = os.path.join(staging_dir, name)
+                if not os.path.exists(staged_path):
+                    print(f"Missing segment {i+1}: {staged_path}")
+                    return []
+
+                is_full = self._is_full_part(i, len(entries), PlannedPart(float(start), float(end), False))
+                output_path = self._get_output_path(base_name, i + 1, is_full, extension)
+                os.replace(staged_path, output_path)
+                self._record_part(job_key, i + 1, output_path)
+                output_files.append(output_path)
+                print(f"Completed segment {i+1}/{len(entries)}: {output_path}")
+
+                if self.progress_callback:
+                    self.progress_callback(f"FFmpeg completed segment {i+1}/{len(entries)}",
+                                           ((i + 1) / len(entries)) * 100)
+
+            annotate(parts=len(output_files), bytes_written=sum(os.path.getsize(path) for path in output_files))
+            return output_files
+
+        except Exception as e:
+            print(f"Error splitting with ffmpeg segment muxer: {e}")
+            return []
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    @traced("split_mp3_native")
+    def _split_mp3_native(self, file_path: str, base_name: str, parts: List[PlannedPart],
+                          job_key: str = None) -> List[str]:
+        """Split an MP3 by copying frame-aligned byte ranges - no decode, no encode, no subprocess"""
+        output_paths = [
+            self._get_output_path(base_name, i + 1, self._is_full_part(i, len(parts), part), ".mp3")
+            for i, part in enumerate(parts)
+        ]
+        try:
+            if self.progress_callback:
+                self.progress_callback(f"Splitting MP3 into {len(parts)} segments without re-encoding...", 20)
+            if not split_mp3(file_path, [part.start for part in parts[1:]], output_paths):
+                return []
+        except (OSError, ValueError) as e:
+            print(f"Error splitting MP3 natively: {e}")
+            return []
+
+        for i, output_path in enumerate(output_paths):
+            self._record_part(job_key, i + 1, output_path)
+            print(f"Completed segment {i+1}/{len(parts)}: {output_path}")
+        annotate(parts=len(output_paths), bytes_written=sum(os.path.getsize(path) for path in output_paths))
+        return output_paths
+
+    def _collect_stream_parts(self, staging_dir: str, segment_list: str, base_name: str, extension: str,
+                              output_files: List[str], expected: int, final: bool = False):
+        """Move parts the segment muxer has closed out of staging.
+
+        An entry is only listed once FFmpeg has finished that segment, and the last
+        segment is only listed after the input ends, so every entry seen while the
+        stream is running is a full part.
+        """
+        if not os.path.exists(segment_list):
+            return
+
+        with open(segment_list, newline='') as f:
+            entries = [row for row in csv.reader(f) if row]
+
+        for i in range(len(output_files), len(entries)):
+            name, start, end = entries[i]
+            staged_path = os.path.join(staging_dir, name)
+            if not os.path.exists(staged_path):
+                break
+
+            is_full = not final or self._is_full_part(i, len(entries), PlannedPart(float(start), float(end), False))
+            output_path = self._get_output_path(base_name, i + 1, is_full, extension)
+            os.replace(staged_path, output_path)
+            output_files.append(output_path)
+            label = expected or "?"
+            print(f"Completed segment {i+1}/{label}: {output_path}")
+
+            if self.progress_callback:
+                progress = min(99, ((i + 1) / expected) * 100) if expected else 0
+                self.progress_callback(f"FFmpeg completed segment {i+1}/{label}", 100 if final else progress)
+
+    def process_stream(self, chunks: Iterable[bytes], base_name: str, audio_only: bool = False,
+                       duration: float = 0) -> List[str]:
+        """Split media arriving as byte chunks, such as a download in progress, without storing the original.
+
+        The chunks are piped into one segmenting FFmpeg process and each part is
+        moved into 45min/ as soon as FFmpeg closes it.
+        """
+        self._create_output_dirs()
+        extension = ".mp3" if audio_only else ".mp4"
+        expected = math.ceil(duration / self.SEGMENT_LENGTH) if duration > 0 else 0
+        staging_dir = tempfile.mkdtemp(prefix=self.STAGING_PREFIX, dir=self.output_folder)
+        segment_list = os.path.join(staging_dir, "segments.csv")
+        log_path = os.path.join(staging_dir, "ffmpeg.log")
+        output_files = []
+
+        if audio_only:
+            codec_args = ['-vn', *self._mp3_args()]
+        else:
+            codec_args = ['-c', 'copy']
+
+        cmd = [
+            self.ffmpeg_path, '-i', 'pipe:0',
+            *codec_args,
+            '-f', 'segment', '-segment_time', str(self.SEGMENT_LENGTH),
+            '-segment_start_number', '1', '-reset_timestamps', '1',
+            '-segment_list', segment_list, '-segment_list_type', 'csv',
+            '-y', os.path.join(staging_dir, f"part%d{extension}")
+        ]
+
+        try:
+            print(f"Streaming split: {base_name}")
+            print(f"Running: {' '.join(cmd)}")
+            if self.progress_callback:
+                self.progress_callback(f"Splitting {base_name} while downloading...", 0)
+
+            with open(log_path, 'w') as log:
+                process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=log,
+                                           bufsize=0, **subprocess_kwargs)
+                last_check = time.monotonic()
+                try:
+                    for chunk in chunks:
+                        process.stdin.write(chunk)
+                        if time.monotonic() - last_check >= 1:
+                            last_check = time.monotonic()
+                            self._collect_stream_parts(staging_dir, segment_list, base_name, extension,
+                                                       output_files, expected)
+                except BrokenPipeError:
+                    print("FFmpeg stopped reading the stream")
+                finally:
+                    try:
+                        process.stdin.close()
+                    except BrokenPipeError:
+                        pass
+                    process.wait()
+
+            if process.returncode != 0:
+                with open(log_path, 'r', errors='replace') as log:
+                    print(f"FFmpeg error: {log.read()[-4000:]}")
+                return []
+
+            self._collect_stream_parts(staging_dir, segment_list, base_name, extension, output_files,
+                                       expected, final=True)
+            if output_files and self.progress_callback:
+                self.progress_callback(f"All {len(output_files)} segments completed while downloading!", 100)
+            return output_files
+
+        except Exception as e:
+            print(f"Error splitting stream {base_name}: {e}")
+            if self.progress_callback:
+                self.progress_callback(f"Error: {str(e)}", -1)
+            return []
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    @traced("delete_original")
     def _delete_original_file(self, file_path: str):
         try:
             if os.path.exists(file_path):
+                annotate(path=file_path, bytes_freed=os.path.getsize(file_path))
                 os.remove(file_path)
                 print(f"Deleted original file: {os.path.basename(file_path)}")
                 return True
@@ -169,12 +701,152 @@ class MediaProcessor:
             print(f"Could not delete original file {file_path}: {e}")
             return False
 
-    def process_video(self, file_path: str, audio_only: bool = False, delete_original: bool = True) -> List[str]:
+    def _seed_probe(self, job: MediaJob):
+        """Use the metadata a download already produced instead of probing the file again"""
+        if job.duration > 0 and os.path.exists(job.file_path) and self.probe_cache.get(job.file_path) is None:
+            self.probe_cache.put(job.file_path, job.to_probe())
+
+    def _resume_state(self, job_key: str, file_path: str) -> JobState:
+        """The journal state for this input, discarded if the file at this path has changed since"""
+        state = self.journal.state(job_key)
+        if state is None:
+            return None
+
+        if os.path.exists(file_path) and state.probed:
+            stat = os.stat(file_path)
+            if (stat.st_size, stat.st_mtime_ns) != (state.probed['size'], state.probed['mtime_ns']):
+                print("Input changed since the journal was written - starting over")
+                self.journal.reset(job_key)
+                return None
+
+        if state.done and any(not os.path.exists(path) for path in state.outputs):
+            print("Some recorded outputs are missing - redoing them")
+            self.journal.record(job_key, 'done', outputs=None)
+        return state
+
+    def _verify_outputs(self, output_files: List[str]) -> bool:
+        """Every part is on disk and non-empty, so the original is no longer needed"""
+        for path in output_files:
+            try:
+                if os.path.getsize(path) <= 0:
+                    return False
+            except OSError:
+                return False
+        return bool(output_files)
+
+    def _finish(self, job_key: str, file_path: str, output_files: List[str], delete_original: bool):
+        """Record the job as done before the original is removed, so a crash in between loses nothing"""
+        state = self.journal.state(job_key)
+        if (state is None or state.probed is None) and os.path.exists(file_path):
+            stat = os.stat(file_path)
+            self.journal.record(job_key, 'probed', duration=None, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        if state is None or state.outputs != output_files:
+            self.journal.record(job_key, 'done', outputs=output_files)
+
+        if delete_original and os.path.exists(file_path):
+            if not self._verify_outputs(output_files):
+                print(f"Some parts are missing or empty - keeping original file: {os.path.basename(file_path)}")
+                return
+            print(f"Processing successful! Cleaning up original file...")
+            if self.progress_callback:
+                self.progress_callback("Cleaning up original file...", 100)
+            
+            if self._delete_original_file(file_path):
+                self.journal.record(job_key, 'deleted')
+
+    def _manifest_key(self, file_path: str, audio_only: bool, base_name: str = None) -> str:
+        """Identifies the input content and every parameter that shapes its parts"""
+        try:
+            file_fingerprint = fingerprint(file_path)
+        except OSError:
+            return None
+        return self.manifest.make_key(
+            file_fingerprint,
+            base_name=base_name or self._get_base_name(file_path),
+            audio_only=audio_only,
+            segment_length=self.SEGMENT_LENGTH,
+            tolerance=self.KEYFRAME_TOLERANCE,
+            mp3=self._mp3_args() if audio_only else None,
+        )
+
+    def is_processed(self, file_path: str, audio_only: bool = False) -> bool:
+        """Whether the journal has this input as done with all of its parts still on disk"""
+        state = self._resume_state(process_key(file_path, audio_only), file_path)
+        return bool(state and state.done)
+
+    @traced("probe_job")
+    def probe_job(self, file_path: Union[str, MediaJob], audio_only: bool = False) -> float:
+        """Probe an input and index its keyframes ahead of process_video, which then finds both cached.
+
+        A job an earlier run finished has no original left to probe; its
+        recorded duration is returned instead.
+        """
+        known = 0.0
+        if isinstance(file_path, MediaJob):
+            self._seed_probe(file_path)
+            known = file_path.duration or 0.0
+            file_path = file_path.file_path
+        if self.is_processed(file_path, audio_only):
+            state = self.journal.state(process_key(file_path, audio_only))
+            return (state.probed or {}).get('duration') or known
+        duration = self._get_video_duration(file_path)
+        if duration > self.SEGMENT_LENGTH and not audio_only:
+            self._load_keyframes(file_path, duration)
+        return duration
+
+    @traced("finish_job")
+    def finish_job(self, file_path: str, audio_only: bool, output_files: List[str],
+                   delete_original: bool = True) -> bool:
+        """Verify the parts of a process_video(cleanup=False) call, then record the job and reclaim the original"""
+        try:
+            if not self._verify_outputs(output_files):
+                print(f"Some parts are missing or empty: {os.path.basename(file_path)}")
+                return False
+            self._finish(process_key(file_path, audio_only), file_path, output_files, delete_original)
+            return True
+        finally:
+            self.storage.release_path(file_path)
+
+    @traced("process_video")
+    def process_video(self, file_path: Union[str, MediaJob], audio_only: bool = False, delete_original: bool = True,
+                      base_name: str = None, cleanup: bool = True) -> List[str]:
+        """Split one input into its parts, returning their paths (empty on failure).
+
+        With cleanup off the job is left for finish_job(), so a pipeline can
+        verify and delete originals in a stage of its own.
+        """
+        if isinstance(file_path, MediaJob):
+            self._seed_probe(file_path)
+            file_path = file_path.file_path
+
         self._create_output_dirs()
         output_files = []
         processing_successful = False
+        job_key = process_key(file_path, audio_only)
+        state = self._resume_state(job_key, file_path)
+        annotate(path=file_path, audio_only=audio_only)
         
         try:
+            if state and state.done:
+                print(f"Already processed: {os.path.basename(file_path)} ({len(state.outputs)} segments)")
+                if self.progress_callback:
+                    self.progress_callback(f"Already processed - {len(state.outputs)} segments verified", 100)
+                processing_successful = True
+                if cleanup:
+                    self._finish(job_key, file_path, state.outputs, delete_original)
+                return list(state.outputs)
+
+            manifest_key = self._manifest_key(file_path, audio_only, base_name)
+            unchanged = self.manifest.get(manifest_key) if manifest_key else None
+            if unchanged:
+                print(f"Unchanged since last run, skipping: {os.path.basename(file_path)} ({len(unchanged)} segments)")
+                if self.progress_callback:
+                    self.progress_callback(f"Unchanged - {len(unchanged)} existing segments verified", 100)
+                processing_successful = True
+                if cleanup:
+                    self._finish(job_key, file_path, unchanged, delete_original)
+                return unchanged
+
             print(f"Processing: {os.path.basename(file_path)}")
             print(f"Using FFmpeg: {self.ffmpeg_path}")
             print(f"Output folder: {self.output_folder}")
@@ -188,6 +860,15 @@ class MediaProcessor:
                 return []
             
             print(f"Duration: {duration/60:.1f} minutes")
+            started = time.time()
+            input_size = os.path.getsize(file_path)
+            # An MP3 input at the part bitrate is split by copying, natively or with -c:a copy; checked
+            # now, since a short input may be moved away below
+            transcoded = not (audio_only and self._is_target_mp3(file_path))
+            if state is None or state.probed is None:
+                stat = os.stat(file_path)
+                self.journal.record(job_key, 'probed', duration=duration, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            done_parts = state.valid_parts() if state else {}
 
             if duration <= self.SEGMENT_LENGTH:
                 print("Video is short - copying to remainder folder")
@@ -195,9 +876,12 @@ class MediaProcessor:
                 if self.progress_callback:
                     self.progress_callback("Copying short video to remainder folder...", 50)
                 
-                output_path = self._copy_short_video(file_path, audio_only)
+                output_path = done_parts.get(1) or self._place_short_file(file_path, audio_only, base_name, duration,
+                                                                          move=delete_original)
                 
                 if os.path.exists(output_path):
+                    if 1 not in done_parts:
+                        self._record_part(job_key, 1, output_path)
                     output_files.append(output_path)
                     processing_successful = True
                     
@@ -211,42 +895,47 @@ class MediaProcessor:
 
             else:
                 print("Video is long - splitting...")
-                num_segments = math.ceil(duration / self.SEGMENT_LENGTH)
-                base_name = self._get_base_name(file_path)
+                base_name = base_name or self._get_base_name(file_path)
                 extension = ".mp3" if audio_only else ".mp4"
-                successful_segments = 0
 
-                for i in range(num_segments):
-                    start_time = i * self.SEGMENT_LENGTH
-                    segment_duration = min(self.SEGMENT_LENGTH, duration - start_time)
-                    is_full = abs(segment_duration - self.SEGMENT_LENGTH) < 1
+                keyframes = None
+                if not audio_only:
+                    keyframes = self._load_keyframes(file_path, duration)
+                parts = plan_cuts(keyframes, duration, self.SEGMENT_LENGTH, self.KEYFRAME_TOLERANCE)
+                num_segments = len(parts)
+                needs_render = any(part.exact_start for part in parts)
+                if needs_render:
+                    print("Some boundaries have no keyframe within tolerance - using smart render for those parts")
 
-                    print(f"Creating segment {i+1}/{num_segments} ({start_time/60:.1f}-{(start_time+segment_duration)/60:.1f} min)")
-                    
-                    if self.progress_callback:
-                        self.progress_callback(f"Processing segment {i+1}/{num_segments}", 
-                                             (i / num_segments) * 100)
-                    
-                    output_path = self._get_output_path(base_name, i + 1, is_full, extension)
-                    
-                    print(f"Writing segment to: {output_path}")
-                    print("Processing with FFmpeg...")
-                    
-                    success = self._split_video_ffmpeg(file_path, int(start_time), int(segment_duration), output_path, audio_only)
-                    
-                    if success and os.path.exists(output_path):
-                        output_files.append(output_path)
-                        successful_segments += 1
-                        print(f"Completed segment {i+1}/{num_segments} in seconds (not minutes!)")
-                    else:
-                        print(f"Failed to create segment {i+1}")
+                workers = 1
+                if audio_only and self.parallel_encode:
+                    workers = min(self.encode_workers, num_segments)
 
-                    if self.progress_callback:
-                        progress = ((i + 1) / num_segments) * 100
-                        self.progress_callback(f"FFmpeg completed segment {i+1}/{num_segments}", progress)
+                segments = []
+                if audio_only and file_path.lower().endswith('.mp3') and self._is_target_mp3(file_path):
+                    segments = self._split_mp3_native(file_path, base_name, parts, job_key)
+                    if not segments:
+                        print("Native MP3 split failed, falling back to FFmpeg...")
+
+                single_pass = (not segments and self.split_mode == "single_pass"
+                               and not needs_render and workers <= 1 and not done_parts)
+                if single_pass and not self.toolchain.has_muxer('segment'):
+                    print("This FFmpeg build has no segment muxer - splitting part by part")
+                elif single_pass:
+                    segments = self._split_single_pass(file_path, base_name, extension, parts, audio_only, job_key)
+                    if not segments:
+                        print("Single-pass split failed, falling back to per-part splitting...")
+
+                if segments:
+                    output_files.extend(segments)
+                    processing_successful = True
+                    num_segments = len(segments)
+                else:
+                    successful_segments = self._split_per_part(file_path, parts, base_name, extension,
+                                                               audio_only, output_files, keyframes, workers,
+                                                               job_key, done_parts)
+                    processing_successful = (successful_segments == num_segments)
 
-                processing_successful = (successful_segments == num_segments)
-                
                 if processing_successful:
                     print(f"Completed splitting into {num_segments} segments with FFmpeg!")
                     if self.progress_callback:
@@ -254,12 +943,14 @@ class MediaProcessor:
                 else:
                     print(f"Only {successful_segments}/{num_segments} segments were successful")
 
-            if processing_successful and delete_original:
-                print(f"Processing successful! Cleaning up original file...")
-                if self.progress_callback:
-                    self.progress_callback("Cleaning up original file...", 100)
-                
-                self._delete_original_file(file_path)
+            if processing_successful:
+                if not done_parts:
+                    self.throughput.record_processing(input_size, duration, time.time() - started, audio_only,
+                                                      transcoded)
+                if manifest_key:
+                    self.manifest.put(manifest_key, file_path, output_files)
+                if cleanup:
+                    self._finish(job_key, file_path, output_files, delete_original)
                 
             return output_files
 
@@ -268,40 +959,78 @@ class MediaProcessor:
             if self.progress_callback:
                 self.progress_callback(f"Error: {str(e)}", -1)
             return []
+        finally:
+            # Whether the original was deleted or kept, the space held for its parts is now accounted for;
+            # a deferred cleanup releases it in finish_job instead
+            if cleanup or not processing_successful:
+                self.storage.release_path(file_path)
+
+    def _batch_progress(self, file_paths: List[Union[str, MediaJob]], audio_only: bool) -> WeightedProgress:
+        """Weight each input by its expected processing time, from its duration and the learned rates"""
+        if not self.progress_callback or len(file_paths) < 2:
+            return None
+
+        weights = []
+        for item in file_paths:
+            if isinstance(item, MediaJob):
+                self._seed_probe(item)
+            path = job_path(item)
+            probe = self._probe(path) if os.path.exists(path) else None
+            duration = probe['duration'] if probe else None
+            size = os.path.getsize(path) if os.path.exists(path) else None
+            weights.append(self.throughput.processing_seconds(duration, size, audio_only))
+        return WeightedProgress(weights, self.progress_callback)
 
-    def process_files(self, file_paths: List[str], audio_only: bool = False, delete_originals: bool = True) -> List[str]:
+    @traced("process_files")
+    def process_files(self, file_paths: List[Union[str, MediaJob]], audio_only: bool = False, delete_originals: bool = True,
+                      max_workers: int = 1) -> List[str]:
         all_output_files = []
         total_files = len(file_paths)
         successful_files = 0
+        base_names = self._get_unique_base_names(file_paths)
         
         print(f"\n=== Starting batch processing in output folder: {self.output_folder} ===")
         
         media_type = "audio files" if audio_only else "videos"
         if self.progress_callback:
             self.progress_callback(f"Starting processing of {total_files} {media_type}...", 0)
-        
-        for idx, file_path in enumerate(file_paths):
+        batch_progress = self._batch_progress(file_paths, audio_only)
+
+        def process_one(idx: int) -> List[str]:
+            file_path = file_paths[idx]
             file_num = idx + 1
+            filename = os.path.basename(job_path(file_path))
             print(f"\n=== Processing file {file_num}/{total_files} with FFmpeg ===")
+
+            # A shallow copy shares the caches and journal but reports into this file's share of the batch
+            worker = self
+            if batch_progress:
+                worker = copy.copy(self)
+                worker.progress_callback = batch_progress.for_item(idx)
             
-            if self.progress_callback:
-                filename = os.path.basename(file_path)
-                self.progress_callback(f"Processing {media_type[:-1]} {file_num}/{total_files}: {filename}", 0)
+            if worker.progress_callback:
+                worker.progress_callback(f"Processing {media_type[:-1]} {file_num}/{total_files}: {filename}", 0)
             
-            output_files = self.process_video(file_path, audio_only, delete_originals)
+            output_files = worker.process_video(file_path, audio_only, delete_originals, base_names[idx])
             
+            if worker.progress_callback:
+                if output_files:
+                    worker.progress_callback(f"Completed {file_num}/{total_files}: {filename} ({len(output_files)} segments)", 100)
+                else:
+                    worker.progress_callback(f"Failed {file_num}/{total_files}: {filename}", -1)
+
+            return output_files
+
+        if max_workers > 1 and total_files > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, total_files)) as executor:
+                results = list(executor.map(process_one, range(total_files)))
+        else:
+            results = [process_one(idx) for idx in range(total_files)]
+
+        for output_files in results:
             if output_files:
                 all_output_files.extend(output_files)
                 successful_files += 1
-                
-                if self.progress_callback:
-                    filename = os.path.basename(file_path)
-                    segments_created = len(output_files)
-                    self.progress_callback(f"Completed {file_num}/{total_files}: {filename} ({segments_created} segments)", 100)
-            else:
-                if self.progress_callback:
-                    filename = os.path.basename(file_path)
-                    self.progress_callback(f"Failed {file_num}/{total_files}: {filename}", -1)
             
         if self.progress_callback:
             total_segments = len(all_output_files)
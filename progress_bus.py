@@ -0,0 +1,135 @@
+import time
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+
+class ProgressEvent(NamedTuple):
+    stage: str  # "download" or "process"
+    message: str
+    percent: float  # 0-100, or -1 for an error
+    job_id: Optional[str] = None
+    timestamp: float = 0.0
+
+    @property
+    def key(self):
+        return self.stage, self.job_id
+
+
+class ProgressBus:
+    """Carries progress from worker threads to whoever displays it.
+
+    publish() never blocks on the UI: it records the event as the latest state
+    for its (stage, job_id) and calls subscribers synchronously. A GUI drains the
+    coalesced latest states at its own frame rate, so a download reporting every
+    chunk costs one redraw per frame instead of one per chunk.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latest: Dict[tuple, ProgressEvent] = {}
+        self._subscribers: List[Callable[[ProgressEvent], None]] = []
+
+    def publish(self, event: ProgressEvent):
+        if not event.timestamp:
+            event = event._replace(timestamp=time.time())
+        with self._lock:
+            # Re-insert so drain() returns jobs in the order they last changed
+            self._latest.pop(event.key, None)
+            self._latest[event.key] = event
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber(event)
+
+    def drain(self) -> List[ProgressEvent]:
+        """The latest event of every job that changed since the previous drain"""
+        with self._lock:
+            events = list(self._latest.values())
+            self._latest.clear()
+        return events
+
+    def subscribe(self, subscriber: Callable[[ProgressEvent], None]) -> Callable[[], None]:
+        with self._lock:
+            self._subscribers.append(subscriber)
+
+        def unsubscribe():
+            with self._lock:
+                if subscriber in self._subscribers:
+                    self._subscribers.remove(subscriber)
+
+        return unsubscribe
+
+    def callback(self, stage: str, job_id: str = None) -> Callable[[str, float], None]:
+        """A progress_callback(message, progress) for VideoDownloader/MediaProcessor that publishes here.
+
+        Its for_job(job_id) gives the same callback for one file, which is how
+        concurrent downloads and splits keep a latest state each.
+        """
+        def publish(message: str, progress: float):
+            self.publish(ProgressEvent(stage, message, progress, job_id))
+        publish.for_job = lambda job: self.callback(stage, job)
+        return publish
+
+
+class JobProgress:
+    """Folds the latest state of every job in one stage into the single bar a GUI shows.
+
+    Each job counts for its expected work, given by weigh() once known (for
+    example seconds from ThroughputModel) and default_weight until then.
+    Jobs of the batch not seen yet count as not started, and a job never
+    goes back, so the bar only moves forward as a playlist grows. A failed
+    job counts as finished; events without a job_id are batch-wide and shown
+    as they are. Running sums keep each update constant-time.
+    """
+
+    def __init__(self, default_weight: float = 1.0):
+        self.default_weight = default_weight
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, total: int = 0, default_weight: float = None):
+        """Start a new batch of total jobs (so far)"""
+        with self._lock:
+            self.total = total
+            if default_weight is not None:
+                self.default_weight = default_weight
+            self._jobs: Dict[str, List[float]] = {}  # job_id -> [weight, fraction done]
+            self._weight = 0.0  # total weight of the jobs seen
+            self._done = 0.0  # sum of weight x fraction done
+
+    def set_total(self, total: int):
+        """How many jobs the batch has so far; it only grows"""
+        with self._lock:
+            self.total = max(self.total, total)
+
+    def _job(self, job_id: str) -> List[float]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            job = self._jobs[job_id] = [self.default_weight, 0.0]
+            self._weight += self.default_weight
+        return job
+
+    def weigh(self, job_id: str, weight: float):
+        """The expected work of job_id, once it is known"""
+        with self._lock:
+            job = self._job(job_id)
+            self._weight += weight - job[0]
+            self._done += (weight - job[0]) * job[1]
+            job[0] = weight
+
+    @property
+    def percent(self) -> float:
+        unseen = max(0, self.total - len(self._jobs))
+        weight = self._weight + unseen * self.default_weight
+        return self._done / weight * 100 if weight > 0 else 0.0
+
+    def update(self, event: ProgressEvent) -> Tuple[str, float]:
+        """The message and percent to show after event"""
+        if event.job_id is None:
+            return event.message, event.percent
+        fraction = 1.0 if event.percent < 0 else min(100.0, max(0.0, event.percent)) / 100
+        with self._lock:
+            job = self._job(event.job_id)
+            if fraction > job[1]:
+                self._done += job[0] * (fraction - job[1])
+                job[1] = fraction
+            return event.message, self.percent
@@ -0,0 +1,70 @@
+import re
+import time
+import threading
+from typing import Callable, Optional
+
+THROTTLE_STATUSES = (403, 429)
+
+
+def throttle_status(error: BaseException) -> Optional[int]:
+    """Return the HTTP status if an error (or the error it wraps) means the server is throttling us"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        status = getattr(error, 'status', None) or getattr(error, 'code', None)
+        if isinstance(status, int) and status in THROTTLE_STATUSES:
+            return status
+
+        match = re.search(r'HTTP Error (\d{3})', str(error))
+        if match and int(match.group(1)) in THROTTLE_STATUSES:
+            return int(match.group(1))
+
+        exc_info = getattr(error, 'exc_info', None)
+        wrapped = exc_info[1] if exc_info else None
+        error = wrapped or error.__cause__ or error.__context__
+    return None
+
+
+class AdaptiveRateLimiter:
+    """Spaces out request starts and adapts the spacing to how the server responds.
+
+    Throttling responses multiply the interval by backoff_factor and pause new
+    starts for that long (or for the server's Retry-After). Every healthy
+    response shrinks the interval by recovery_factor down to min_interval.
+    """
+
+    def __init__(self, initial_interval: float = 1.0, min_interval: float = 0.0, max_interval: float = 120.0,
+                 backoff_factor: float = 2.0, recovery_factor: float = 0.75, backoff_floor: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.interval = initial_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.recovery_factor = recovery_factor
+        self.backoff_floor = backoff_floor
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self) -> float:
+        """Block until the caller may start a request; returns the time waited"""
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+
+        delay = slot - now
+        if delay > 0:
+            self._sleep(delay)
+        return max(delay, 0.0)
+
+    def record_success(self):
+        with self._lock:
+            self.interval = max(self.min_interval, self.interval * self.recovery_factor)
+
+    def record_throttle(self, retry_after: float = None):
+        with self._lock:
+            self.interval = min(self.max_interval, max(self.backoff_floor, self.interval * self.backoff_factor))
+            pause = retry_after if retry_after is not None else self.interval
+            self._next_slot = max(self._next_slot, self._clock() + pause)
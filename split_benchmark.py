@@ -0,0 +1,216 @@
+"""Split/encode benchmark: times MediaProcessor.process_video on synthetic media.
+
+Inputs are generated offline with FFmpeg's lavfi sources (testsrc + sine) and
+kept in --media-dir, so every run splits byte-identical files. Each measurement
+runs in a fresh interpreter with a fresh output folder, so no probe, keyframe
+or manifest cache carries over. Results are written as JSON and can be checked
+against a saved baseline:
+
+    python split_benchmark.py --durations 10m,2h --output bench.json
+    python split_benchmark.py --durations 10m,2h --baseline bench.json --tolerance 0.15
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DURATIONS = {"10m": 600, "2h": 7200, "8h": 28800}
+MODES = ("mp4_copy", "mp4_reencode", "mp3")
+# 1.92 s GOPs: close enough to every 45-minute boundary for stream copy to snap to
+# a keyframe, but most boundaries are not keyframes themselves, which is what
+# mp4_reencode (no snapping tolerance) needs to exercise the smart-render path
+GOP_FRAMES = 48
+FRAME_RATE = 25
+
+WORKER_PROBE = """
+import os, sys, json, time, contextlib
+try:
+    import resource
+except ImportError:  # Windows: wall and CPU time only
+    resource = None
+sys.path.insert(0, {here!r})
+from processor import MediaProcessor
+from throughput import ThroughputModel
+
+mode = {mode!r}
+if mode == "mp4_reencode":
+    MediaProcessor.KEYFRAME_TOLERANCE = 0.0
+
+wall_start = time.perf_counter()
+with contextlib.redirect_stdout(sys.stderr):
+    # A throwaway model, so benchmark runs do not skew the user's learned rates
+    throughput = ThroughputModel(os.path.join({output!r}, "throughput.json"))
+    processor = MediaProcessor(output_folder={output!r}, split_mode="single_pass", throughput=throughput)
+    outputs = processor.process_video({source!r}, audio_only=(mode == "mp3"), delete_original=False)
+wall = time.perf_counter() - wall_start
+
+# os.times() counts FFmpeg's CPU too, as a waited-for child; on Windows the children fields are zero
+times = os.times()
+stats = {{
+    "wall_s": wall,
+    "cpu_user_s": times.user + times.children_user,
+    "cpu_sys_s": times.system + times.children_system,
+    "peak_rss_bytes": None,
+    # getrusage counts block I/O operations, not bytes; page-cache hits are not counted at all
+    "block_io_in": None,
+    "block_io_out": None,
+    "input_bytes": os.path.getsize({source!r}),
+    "output_bytes": sum(os.path.getsize(path) for path in outputs),
+    "parts": len(outputs),
+}}
+if resource is not None:
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    rss_unit = 1 if sys.platform == "darwin" else 1024
+    stats["peak_rss_bytes"] = max(own.ru_maxrss, children.ru_maxrss) * rss_unit
+    stats["block_io_in"] = own.ru_inblock + children.ru_inblock
+    stats["block_io_out"] = own.ru_oublock + children.ru_oublock
+print(json.dumps(stats))
+"""
+
+
+def parse_durations(text: str) -> Dict[str, int]:
+    durations = {}
+    for label in text.split(","):
+        label = label.strip()
+        if label not in DURATIONS:
+            raise argparse.ArgumentTypeError(f"unknown duration {label!r} (choose from {', '.join(DURATIONS)})")
+        durations[label] = DURATIONS[label]
+    return durations
+
+
+def generate_input(ffmpeg_path: str, media_dir: str, label: str, seconds: int) -> Optional[str]:
+    """Synthetic H.264/AAC input of the given length, generated once and reused"""
+    path = os.path.join(media_dir, f"bench_{label}_g{GOP_FRAMES}.mp4")
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(media_dir, exist_ok=True)
+    temp_path = path + ".partial.mp4"
+    cmd = [
+        ffmpeg_path, '-hide_banner', '-v', 'error',
+        '-f', 'lavfi', '-i', f"testsrc=size=320x240:rate={FRAME_RATE}",
+        '-f', 'lavfi', '-i', "sine=frequency=440:sample_rate=44100",
+        '-t', str(seconds), '-map', '0:v', '-map', '1:a',
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p',
+        '-g', str(GOP_FRAMES), '-keyint_min', str(GOP_FRAMES), '-sc_threshold', '0',
+        '-c:a', 'aac', '-b:a', '64k', '-y', temp_path
+    ]
+    print(f"Generating {label} input ({seconds / 3600:.1f} h): {path}")
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"Could not generate {label} input: {result.stderr.strip()}", file=sys.stderr)
+        return None
+    os.replace(temp_path, path)
+    return path
+
+
+def run_worker(source: str, mode: str, timeout: float) -> Optional[Dict]:
+    output = tempfile.mkdtemp(prefix="split45_bench_")
+    try:
+        code = WORKER_PROBE.format(here=HERE, mode=mode, output=output, source=source)
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=timeout)
+        lines = [line for line in result.stdout.splitlines() if line.startswith("{")]
+        if result.returncode != 0 or not lines:
+            tail = result.stderr.strip().splitlines()[-1:] or [str(result.returncode)]
+            print(f"Run failed ({mode}, {os.path.basename(source)}): {tail[0]}", file=sys.stderr)
+            return None
+        data = json.loads(lines[-1])
+        return data if data["parts"] else None
+    finally:
+        shutil.rmtree(output, ignore_errors=True)
+
+
+def best_of(source: str, mode: str, repeat: int, timeout: float) -> Optional[Dict]:
+    """Fastest of several runs; the minimum is the least noisy estimate of the real cost"""
+    runs = [run for run in (run_worker(source, mode, timeout) for _ in range(repeat)) if run]
+    if not runs:
+        return None
+    return min(runs, key=lambda run: run["wall_s"])
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Wall-time regressions beyond tolerance (a fraction) against the baseline's matching cases"""
+    regressions = []
+    for case, measured in results["cases"].items():
+        before = baseline.get("cases", {}).get(case)
+        if not measured or not before:
+            continue
+        change = measured["wall_s"] / before["wall_s"] - 1 if before["wall_s"] > 0 else 0.0
+        print(f"{case}: {before['wall_s']:.2f}s -> {measured['wall_s']:.2f}s ({change:+.1%})")
+        if change > tolerance:
+            regressions.append(f"{case} is {change:.1%} slower ({before['wall_s']:.2f}s -> {measured['wall_s']:.2f}s)")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--durations", type=parse_durations, default=parse_durations("10m,2h,8h"),
+                        help="comma-separated input lengths: 10m, 2h, 8h (default: all)")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"comma-separated modes: {', '.join(MODES)}")
+    parser.add_argument("--media-dir", default=os.path.join(tempfile.gettempdir(), "split45_bench_media"),
+                        help="where generated inputs are kept between runs")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case (fastest is kept)")
+    parser.add_argument("--timeout", type=float, default=4 * 3600, help="seconds before a run is abandoned")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this earlier --output file")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="fail when a case is slower than the baseline by more than this fraction")
+    args = parser.parse_args(argv)
+
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(unknown)}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+
+    sys.path.insert(0, HERE)
+    from toolchain import get_toolchain
+    toolchain = get_toolchain()
+
+    results = {
+        "python": sys.version.split()[0], "platform": sys.platform,
+        "ffmpeg": toolchain.capabilities["version"], "cases": {},
+    }
+    for label, seconds in args.durations.items():
+        source = generate_input(toolchain.ffmpeg_path, args.media_dir, label, seconds)
+        if not source:
+            return 1
+        for mode in modes:
+            case = f"{label}/{mode}"
+            results["cases"][case] = best_of(source, mode, args.repeat, args.timeout)
+            measured = results["cases"][case]
+            if measured:
+                rss = measured['peak_rss_bytes']
+                print(f"{case}: {measured['wall_s']:.2f}s wall, "
+                      f"{measured['cpu_user_s'] + measured['cpu_sys_s']:.2f}s CPU, "
+                      f"{f'{rss / 2**20:.0f} MiB' if rss is not None else 'unknown'} peak RSS, "
+                      f"{measured['parts']} parts")
+            else:
+                print(f"{case}: failed")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved split benchmark to {args.output}")
+
+    failures = [case for case, measured in results["cases"].items() if not measured]
+    if baseline:
+        failures += compare(results, baseline, args.tolerance)
+
+    for failure in failures:
+        print(f"Failed: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Cold-start benchmark: import time of each module and the GUI's time to first frame.
+
+Every measurement runs in a fresh interpreter so nothing is already imported.
+Results are written as JSON and checked against a budget:
+
+    python startup_benchmark.py --output startup.json --budget-ms 400
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from typing import Dict, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODULES = ("processor", "downloader", "cli", "main")
+
+IMPORT_PROBE = """
+import sys, time, json
+sys.path.insert(0, {here!r})
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"import_ms": elapsed * 1000, "yt_dlp_loaded": "yt_dlp" in sys.modules,
+                   "gui_loaded": "tkinter" in sys.modules}}))
+"""
+
+FIRST_FRAME_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+sys.path.insert(0, {here!r})
+import main
+imported = time.perf_counter()
+app = main.App()
+constructed = time.perf_counter()
+def shown(event=None):
+    if event is not None and event.widget is not app:
+        return
+    mapped = time.perf_counter()
+    print(json.dumps({{"import_ms": (imported - start) * 1000, "construct_ms": (constructed - imported) * 1000,
+                       "first_frame_ms": (mapped - start) * 1000,
+                       "yt_dlp_loaded": "yt_dlp" in sys.modules}}))
+    sys.stdout.flush()
+    app.after(0, app.destroy)
+app.bind("<Map>", shown)
+app.mainloop()
+"""
+
+
+def run_probe(code: str, timeout: float = 60) -> Optional[Dict]:
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=timeout)
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    if result.returncode != 0:
+        print(f"Probe failed: {result.stderr.strip().splitlines()[-1] if result.stderr.strip() else result.returncode}",
+              file=sys.stderr)
+        return None
+
+    lines = [line for line in result.stdout.splitlines() if line.startswith("{")]
+    if not lines:
+        return None
+    data = json.loads(lines[-1])
+    data["process_wall_ms"] = wall_ms
+    return data
+
+
+def best_of(code: str, repeat: int) -> Optional[Dict]:
+    """Lowest of several runs of one probe; the minimum is the least noisy estimate of cold cost"""
+    runs = [run for run in (run_probe(code) for _ in range(repeat)) if run]
+    if not runs:
+        return None
+    return min(runs, key=lambda run: run["process_wall_ms"])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (best is kept)")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="fail if importing processor, downloader or cli takes longer")
+    parser.add_argument("--skip-gui", action="store_true", help="do not measure time to first frame")
+    args = parser.parse_args(argv)
+
+    results = {"python": sys.version.split()[0], "platform": sys.platform, "imports": {}}
+    for module in MODULES:
+        results["imports"][module] = best_of(IMPORT_PROBE.format(here=HERE, module=module), args.repeat)
+        print(f"import {module}: {results['imports'][module]}")
+
+    if not args.skip_gui:
+        results["first_frame"] = best_of(FIRST_FRAME_PROBE.format(here=HERE), args.repeat)
+        print(f"first frame: {results['first_frame']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved startup benchmark to {args.output}")
+
+    failures = []
+    for module in ("processor", "downloader", "cli"):
+        measured = results["imports"].get(module)
+        if measured and measured["yt_dlp_loaded"]:
+            failures.append(f"import {module} loads yt_dlp")
+        if measured and args.budget_ms is not None and measured["import_ms"] > args.budget_ms:
+            failures.append(f"import {module} took {measured['import_ms']:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    if results["imports"].get("cli") and results["imports"]["cli"]["gui_loaded"]:
+        failures.append("import cli loads the GUI stack")
+
+    for failure in failures:
+        print(f"Over budget: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+import os
+import shutil
+import threading
+from typing import Callable, Dict, Optional
+
+RESERVE_BYTES = 1024 ** 3  # always leave this much free on the output volume
+
+
+def expected_size(info: dict) -> int:
+    """Bytes a download will take, from yt-dlp's filesize or, failing that, bitrate x duration"""
+    size = info.get('filesize') or info.get('filesize_approx')
+    if not size:
+        formats = info.get('requested_formats') or []
+        size = sum(f.get('filesize') or f.get('filesize_approx') or 0 for f in formats)
+    if not size:
+        tbr = info.get('tbr') or info.get('abr') or 0  # kbit/s
+        size = tbr * 125 * (info.get('duration') or 0)
+    return int(size)
+
+
+class Reservation:
+    """Space promised to one job: the download plus the parts it will be split into"""
+
+    def __init__(self, budget: 'StorageBudget', label: str, size: int):
+        self.budget = budget
+        self.label = label
+        self.size = size
+
+    def downloaded(self, path: str):
+        """The download is now on disk (and in free space); keep only what its parts will still need"""
+        self.budget._settle(self, path, os.path.getsize(path) if os.path.exists(path) else 0)
+
+    def release(self):
+        self.budget._settle(self, None, 0)
+
+
+class StorageBudget:
+    """Admission control for downloads against the free space on the output volume.
+
+    Each admitted download reserves twice its expected size: once for the
+    original and once for its parts, which exist together until the original is
+    deleted. A reservation shrinks as the download lands and is released when
+    MediaProcessor has finished with that file, so free space minus outstanding
+    reservations is what later downloads may use. When that headroom is too
+    small admit() waits for in-flight jobs to hand space back.
+    """
+
+    def __init__(self, path: str, reserve_bytes: int = RESERVE_BYTES, poll_interval: float = 5.0,
+                 free_space: Callable[[str], int] = None):
+        self.path = path
+        self.reserve_bytes = reserve_bytes
+        self.poll_interval = poll_interval
+        self._free_space = free_space or (lambda p: shutil.disk_usage(p).free)
+        self._cond = threading.Condition()
+        self._reservations: Dict[int, Reservation] = {}
+        self._by_path: Dict[str, Reservation] = {}
+
+    def free(self) -> int:
+        path = self.path
+        while not os.path.exists(path) and os.path.dirname(path) != path:
+            path = os.path.dirname(path)  # the output folder may not be created yet
+        try:
+            return self._free_space(path)
+        except OSError:
+            return 0
+
+    @property
+    def reserved(self) -> int:
+        with self._cond:
+            return sum(r.size for r in self._reservations.values())
+
+    def headroom(self) -> int:
+        return self.free() - self.reserved - self.reserve_bytes
+
+    def admit(self, expected_bytes: int, label: str = "", wait: bool = True,
+              on_wait: Callable[[int, int], None] = None, with_parts: bool = True) -> Optional[Reservation]:
+        """Reserve room for a download of expected_bytes, or None if it can never fit.
+
+        with_parts also reserves room for the parts it will be split into; a
+        download-only reservation is released as soon as the file lands.
+
+        With wait set this blocks while other jobs still hold reservations,
+        since finishing them frees their originals; once nothing is in flight
+        and the space is still missing, waiting would be forever.
+        """
+        needed = (2 if with_parts else 1) * max(0, expected_bytes)
+        waited = False
+        with self._cond:
+            while True:
+                headroom = self.free() - sum(r.size for r in self._reservations.values()) - self.reserve_bytes
+                if needed <= headroom:
+                    reservation = Reservation(self, label, needed)
+                    self._reservations[id(reservation)] = reservation
+                    if waited:
+                        print(f"Disk space available again, starting {label}")
+                    return reservation
+                if not wait or not self._reservations:
+                    print(f"Not enough disk space for {label}: need {needed / 1e9:.1f} GB, "
+                          f"{max(0, headroom) / 1e9:.1f} GB available")
+                    return None
+                if not waited:
+                    print(f"Low disk space: pausing {label} until running jobs free "
+                          f"{(needed - headroom) / 1e9:.1f} GB")
+                    waited = True
+                if on_wait:
+                    on_wait(needed, max(0, headroom))
+                self._cond.wait(self.poll_interval)
+
+    def _settle(self, reservation: Reservation, path: Optional[str], remaining: int):
+        with self._cond:
+            if path and remaining > 0:
+                reservation.size = remaining
+                self._by_path[os.path.abspath(path)] = reservation
+            else:
+                self._reservations.pop(id(reservation), None)
+            self._cond.notify_all()
+
+    def release_path(self, path: str):
+        """MediaProcessor is done with path: its parts are written and the original is gone or kept"""
+        with self._cond:
+            reservation = self._by_path.pop(os.path.abspath(path), None)
+            if reservation is not None:
+                self._reservations.pop(id(reservation), None)
+                self._cond.notify_all()
+
+
+_budgets: Dict[str, StorageBudget] = {}
+_budgets_lock = threading.Lock()
+
+
+def get_storage_budget(output_folder: str) -> StorageBudget:
+    """One budget per output folder, shared by the downloader that reserves and the processor that releases"""
+    path = os.path.abspath(output_folder)
+    with _budgets_lock:
+        if path not in _budgets:
+            _budgets[path] = StorageBudget(path)
+        return _budgets[path]
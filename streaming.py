@@ -0,0 +1,39 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Iterable, List
+
+
+def stream_split_one(downloader, processor, url: str, audio_only: bool = False, file_index: int = 1) -> List[str]:
+    """Download url straight into the segmenting FFmpeg process; no original ever lands in downloads/"""
+    opened = downloader.open_stream(url, audio_only, file_index)
+    if opened is None:
+        return []
+
+    job, chunks = opened
+    base_name = os.path.splitext(os.path.basename(job.file_path))[0]
+    return processor.process_stream(chunks, base_name, audio_only, job.duration)
+
+
+def stream_split(downloader, processor, urls: Iterable[str], audio_only: bool = False,
+                 max_concurrent: int = None) -> List[str]:
+    """Stream-split every url, up to max_concurrent at once, returning all parts in url order"""
+    workers = max(1, max_concurrent or downloader.max_concurrent)
+    downloader.total_files = 0
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+
+        def collect(finished):
+            for future in finished:
+                results[pending.pop(future)] = future.result()
+
+        # Playlists and channels are expanded page by page, only as fast as streams start
+        for idx, url in enumerate(downloader.expand_urls(urls)):
+            if len(pending) >= 2 * workers:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+            pending[executor.submit(stream_split_one, downloader, processor, url, audio_only, idx + 1)] = idx
+        collect(as_completed(list(pending)))
+
+    return [path for idx in sorted(results) for path in results[idx]]
@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+
+@pytest.fixture
+def downloader(tmp_path):
+    from downloader import VideoDownloader
+    from throughput import ThroughputModel
+
+    return VideoDownloader(output_folder=str(tmp_path), throughput=ThroughputModel(str(tmp_path / "throughput.json")))
+
+
+def test_same_titled_videos_get_their_own_files_and_parts(downloader):
+    yt_dlp = pytest.importorskip("yt_dlp")
+    from processor import MediaProcessor
+
+    opts = {'outtmpl': downloader._get_output_template(False)}
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        names = [ydl.prepare_filename({'id': video_id, 'title': "Same Title", 'ext': 'mp4'})
+                 for video_id in ("abc", "def")]
+
+    assert names[0] != names[1]
+    assert all(os.path.dirname(name) == downloader.downloads_folder for name in names)
+    base_names = {MediaProcessor._get_base_name(None, name) for name in names}
+    assert len(base_names) == 2
+
+
+def test_output_template_names_each_video_by_id(downloader):
+    for audio_only in (False, True):
+        assert "%(id)s" in os.path.basename(downloader._get_output_template(audio_only))
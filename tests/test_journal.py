@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from journal import Journal, download_key, process_key
+from media_job import MediaJob
+
+URL = "https://video/x"
+
+
+@pytest.fixture
+def downloader(tmp_path):
+    from downloader import VideoDownloader
+    from throughput import ThroughputModel
+
+    downloader = VideoDownloader(output_folder=str(tmp_path),
+                                 throughput=ThroughputModel(str(tmp_path / "throughput.json")))
+    os.makedirs(downloader.downloads_folder)
+    os.makedirs(downloader.min45_folder)
+    return downloader
+
+
+def record_download(downloader, name, audio_only=True, create=True):
+    path = os.path.join(downloader.downloads_folder, name)
+    if create:
+        with open(path, "wb") as f:
+            f.write(b"media")
+    downloader.journal.record(download_key(URL, audio_only), 'downloaded',
+                              job_record=MediaJob(path, URL, duration=60.0)._asdict())
+    return path
+
+
+def record_processed(downloader, path, audio_only=True, create_parts=True):
+    part = os.path.join(downloader.min45_folder, "x_part1.mp3")
+    if create_parts:
+        with open(part, "wb") as f:
+            f.write(b"part")
+    downloader.journal.record(process_key(path, audio_only), 'done', outputs=[part])
+    return part
+
+
+def test_journal_replays_from_disk(tmp_path):
+    journal = Journal(str(tmp_path / "journal.jsonl"))
+    journal.record("job", 'downloaded', job_record={'file_path': "a.mp4"})
+    journal.record("job", 'done', outputs=["a_part1.mp4"])
+
+    state = Journal(journal.path).state("job")
+    assert state.downloaded == {'file_path': "a.mp4"}
+    assert state.done and state.outputs == ["a_part1.mp4"]
+
+
+def test_processing_reuses_a_download_whose_parts_remain(downloader):
+    path = record_download(downloader, "x.webm", create=False)
+    record_processed(downloader, path)
+    job = downloader._journaled_download(URL, True, for_processing=True)
+    assert job is not None and job.file_path == path
+
+
+def test_processing_downloads_again_when_a_part_is_missing(downloader):
+    path = record_download(downloader, "x.webm", create=False)
+    record_processed(downloader, path, create_parts=False)
+    assert downloader._journaled_download(URL, True, for_processing=True) is None
+
+
+def test_download_only_never_returns_a_deleted_original(downloader):
+    path = record_download(downloader, "x.webm", create=False)
+    record_processed(downloader, path)
+    assert downloader._journaled_download(URL, True, for_processing=False) is None
+
+
+def test_download_only_audio_wants_the_mp3_not_the_native_file(downloader):
+    record_download(downloader, "x.webm")
+    assert downloader._journaled_download(URL, True, for_processing=False) is None
+    assert downloader._journaled_download(URL, True, for_processing=True) is not None
+
+
+def test_download_only_reuses_an_existing_mp3(downloader):
+    path = record_download(downloader, "x.mp3")
+    job = downloader._journaled_download(URL, True, for_processing=False)
+    assert job is not None and job.file_path == path
+
+
+def test_audio_and_video_downloads_are_journaled_apart(downloader):
+    record_download(downloader, "x.mp4", audio_only=False)
+    assert downloader._journaled_download(URL, True, for_processing=True) is None
+    assert downloader._journaled_download(URL, False, for_processing=False) is not None
@@ -0,0 +1,100 @@
+import threading
+
+import pytest
+
+from pipeline import Pipeline, Stage
+
+
+def test_items_pass_through_every_stage():
+    pipeline = Pipeline([Stage('double', lambda x: x * 2, workers=3), Stage('inc', lambda x: x + 1)]).start()
+    assert pipeline.feed(range(20)) == 20
+    assert pipeline.join(5)
+    assert sorted(pipeline.results) == [x * 2 + 1 for x in range(20)]
+    assert pipeline.metrics()['double']['processed'] == 20
+
+
+def test_none_drops_and_exceptions_fail_only_their_item():
+    def handler(x):
+        if x == 3:
+            raise ValueError("bad item")
+        return None if x % 2 else x
+
+    pipeline = Pipeline([Stage('filter', handler)]).start()
+    pipeline.feed(range(6))
+    assert pipeline.join(5)
+    assert sorted(pipeline.results) == [0, 2, 4]
+    metrics = pipeline.metrics()['filter']
+    assert (metrics['processed'], metrics['dropped'], metrics['failed']) == (3, 3, 1)
+
+
+def test_a_raising_on_result_does_not_hang_join():
+    seen = []
+
+    def on_result(item):
+        seen.append(item)
+        raise RuntimeError("consumer failed")
+
+    pipeline = Pipeline([Stage('pass', lambda x: x)], on_result=on_result).start()
+    pipeline.feed(range(3))
+    assert pipeline.join(5)
+    assert sorted(seen) == [0, 1, 2]
+
+
+def test_input_is_read_only_as_fast_as_the_stages_take_it():
+    release = threading.Event()
+    consumed = []
+
+    def items():
+        for n in range(1000):
+            consumed.append(n)
+            yield n
+
+    pipeline = Pipeline([Stage('slow', lambda x: release.wait(5) and x, queue_size=2)]).start()
+    feeder = threading.Thread(target=pipeline.feed, args=(items(),))
+    feeder.start()
+    feeder.join(0.5)
+    # One item in the handler, two queued, one waiting to be put
+    assert feeder.is_alive()
+    assert len(consumed) <= 4
+    release.set()
+    feeder.join(5)
+    assert pipeline.join(5)
+    assert len(pipeline.results) == 1000
+
+
+def test_cancel_drops_queued_items_and_join_returns():
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking(x):
+        started.set()
+        release.wait(5)
+        return x
+
+    pipeline = Pipeline([Stage('block', blocking, queue_size=5), Stage('after', lambda x: x)]).start()
+    for n in range(4):
+        assert pipeline.submit(n)
+    assert started.wait(5)
+
+    done = threading.Thread(target=pipeline.shutdown, kwargs={'cancel': True})
+    done.start()
+    release.set()
+    done.join(5)
+    assert not done.is_alive()
+    assert pipeline.join(0)
+    # Only the item already in the handler can have finished
+    assert len(pipeline.results) <= 1
+    assert pipeline.submit(99) is False
+
+
+def test_submit_after_close_is_an_error():
+    pipeline = Pipeline([Stage('pass', lambda x: x)]).start()
+    pipeline.close()
+    with pytest.raises(RuntimeError):
+        pipeline.submit(1)
+    assert pipeline.join(5)
+
+
+def test_a_pipeline_needs_stages():
+    with pytest.raises(ValueError):
+        Pipeline([])
@@ -0,0 +1,102 @@
+import itertools
+
+from playlist import PlaylistExpander, is_collection_extractor
+
+
+class PagedExtractor:
+    """Stands in for yt-dlp's flat extraction: collection entries come from a generator, one page at a time"""
+
+    def __init__(self, playlists, page_size=3):
+        self.playlists = playlists  # url -> list of entries
+        self.page_size = page_size
+        self.pages_read = []
+        self.extracted = []
+
+    def _pages(self, url):
+        entries = self.playlists[url]
+        for start in range(0, len(entries), self.page_size):
+            self.pages_read.append((url, start // self.page_size))
+            if isinstance(entries[start], Exception):
+                raise entries[start]
+            yield from entries[start:start + self.page_size]
+
+    def __call__(self, url):
+        self.extracted.append(url)
+        if url not in self.playlists:
+            return {'_type': 'video', 'id': url}
+        return {'_type': 'playlist', 'title': url, 'entries': self._pages(url)}
+
+
+def video(n):
+    return {'_type': 'url', 'url': f"https://video/{n}", 'ie_key': 'Youtube'}
+
+
+def is_list(url):
+    return url.startswith("https://list/")
+
+
+def test_plain_urls_pass_through_without_extraction():
+    extractor = PagedExtractor({})
+    expander = PlaylistExpander(extractor, is_list)
+    assert list(expander.expand(["https://video/a", "https://video/b"])) == ["https://video/a", "https://video/b"]
+    assert extractor.extracted == []
+
+
+def test_playlist_pages_are_read_only_as_entries_are_consumed():
+    extractor = PagedExtractor({"https://list/big": [video(n) for n in range(10_000)]}, page_size=50)
+    urls = PlaylistExpander(extractor, is_list).expand(["https://list/big"])
+
+    assert extractor.extracted == []  # nothing happens until the first URL is asked for
+    first = list(itertools.islice(urls, 120))
+    assert first == [f"https://video/{n}" for n in range(120)]
+    assert len(extractor.pages_read) == 3
+
+
+def test_urls_after_a_playlist_wait_for_it():
+    extractor = PagedExtractor({"https://list/a": [video(1), video(2)]})
+    expander = PlaylistExpander(extractor, is_list)
+    assert list(expander.expand(["https://video/0", "https://list/a", "https://video/3"])) == \
+        ["https://video/0", "https://video/1", "https://video/2", "https://video/3"]
+
+
+def test_channel_tabs_and_nested_playlists_are_expanded():
+    extractor = PagedExtractor({
+        "https://list/channel": [
+            {'_type': 'url', 'url': "https://list/uploads", 'ie_key': 'YoutubeTab'},
+            {'_type': 'playlist', 'entries': [video(9)]},
+        ],
+        "https://list/uploads": [video(1), None, {'_type': 'url'}, video(2)],
+    })
+    assert list(PlaylistExpander(extractor, is_list).expand(["https://list/channel"])) == \
+        ["https://video/1", "https://video/2", "https://video/9"]
+
+
+def test_a_failing_page_keeps_the_entries_already_yielded():
+    extractor = PagedExtractor({"https://list/flaky": [video(1), video(2), RuntimeError("page 2 failed"), video(4)]},
+                               page_size=2)
+    assert list(PlaylistExpander(extractor, is_list).expand(["https://list/flaky", "https://video/5"])) == \
+        ["https://video/1", "https://video/2", "https://video/5"]
+
+
+def test_an_unextractable_url_is_skipped():
+    def extract(url):
+        raise RuntimeError("private")
+
+    assert list(PlaylistExpander(extract, is_list).expand(["https://list/gone", "https://video/1"])) == \
+        ["https://video/1"]
+
+
+def test_expansion_stops_at_max_depth():
+    # A playlist that lists itself would otherwise recurse forever
+    extractor = PagedExtractor({"https://list/self": [{'_type': 'url', 'url': "https://list/self",
+                                                       'ie_key': 'YoutubePlaylist'}]})
+    urls = list(PlaylistExpander(extractor, is_list).expand(["https://list/self"]))
+    assert urls == ["https://list/self"]
+    assert len(extractor.extracted) == PlaylistExpander.MAX_DEPTH + 1
+
+
+def test_collection_extractor_names():
+    assert is_collection_extractor("youtube:tab")
+    assert is_collection_extractor("YoutubePlaylist")
+    assert not is_collection_extractor("Youtube")
+    assert not is_collection_extractor(None)
@@ -0,0 +1,60 @@
+import pytest
+
+from progress_bus import JobProgress, ProgressBus, ProgressEvent
+
+
+def event(job_id, percent, message="msg"):
+    return ProgressEvent("download", message, percent, job_id)
+
+
+def test_drain_keeps_the_latest_event_per_job():
+    bus = ProgressBus()
+    callback = bus.callback("download")
+    for percent in (10, 20, 30):
+        callback.for_job("1")("one", percent)
+    callback.for_job("2")("two", 5)
+    callback("batch", 0)
+
+    latest = {e.job_id: e.percent for e in bus.drain()}
+    assert latest == {"1": 30, "2": 5, None: 0}
+    assert bus.drain() == []
+
+
+def test_the_bar_counts_jobs_not_seen_yet():
+    board = JobProgress()
+    board.reset(total=50)
+    for job in ("1", "2", "3"):
+        board.update(event(job, 100))
+    assert board.percent == pytest.approx(6.0)
+    # A fourth job starting must not pull the bar back
+    _, percent = board.update(event("4", 0))
+    assert percent == pytest.approx(6.0)
+
+
+def test_the_bar_never_moves_backwards():
+    board = JobProgress()
+    board.reset(total=2)
+    board.update(event("1", 80))
+    _, percent = board.update(event("1", 0, "⏳ Throttled, retrying"))
+    assert percent == pytest.approx(40.0)
+    board.set_total(1)  # the total only grows
+    assert board.total == 2
+
+
+def test_failed_jobs_count_as_finished_and_batch_events_pass_through():
+    board = JobProgress()
+    board.reset(total=2)
+    assert board.update(event("1", -1, "❌ Error"))[1] == pytest.approx(50.0)
+    assert board.update(event(None, 0, "Starting")) == ("Starting", 0)
+
+
+def test_jobs_are_weighted_by_their_expected_work():
+    board = JobProgress(default_weight=10.0)
+    board.reset(total=2)
+    board.weigh("1", 30.0)
+    board.update(event("1", 100))
+    assert board.percent == pytest.approx(75.0)
+    # Weighing a job after it made progress keeps its progress
+    board.update(event("2", 50))
+    board.weigh("2", 30.0)
+    assert board.percent == pytest.approx(75.0)
@@ -0,0 +1,206 @@
+import threading
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from rate_limiter import AdaptiveRateLimiter, throttle_status
+
+
+class FakeClock:
+    """A monotonic clock that only moves when the limiter sleeps"""
+
+    def __init__(self, now: float = 100.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_limiter(**kwargs):
+    clock = FakeClock()
+    return AdaptiveRateLimiter(clock=clock, sleep=clock.sleep, **kwargs), clock
+
+
+def http_error(status: int) -> urllib.error.HTTPError:
+    return urllib.error.HTTPError("http://127.0.0.1/", status, "throttled", {}, None)
+
+
+class DownloadError(Exception):
+    """Shaped like yt_dlp.utils.DownloadError: the real cause is only in exc_info"""
+
+    def __init__(self, message, exc_info=None):
+        super().__init__(message)
+        self.exc_info = exc_info
+
+
+def test_first_request_starts_immediately_and_later_ones_are_spaced():
+    limiter, clock = make_limiter(initial_interval=1.0)
+    assert limiter.acquire() == 0.0
+    assert limiter.acquire() == pytest.approx(1.0)
+    assert limiter.acquire() == pytest.approx(1.0)
+    assert clock.sleeps == [pytest.approx(1.0), pytest.approx(1.0)]
+
+
+def test_healthy_responses_shrink_the_interval_down_to_the_minimum():
+    limiter, _ = make_limiter(initial_interval=1.0, min_interval=0.5, recovery_factor=0.5)
+    limiter.record_success()
+    assert limiter.interval == pytest.approx(0.5)
+    limiter.record_success()
+    assert limiter.interval == pytest.approx(0.5)
+
+
+def test_throttle_backs_off_and_pauses_new_starts():
+    limiter, clock = make_limiter(initial_interval=1.0, backoff_factor=2.0)
+    limiter.acquire()
+    limiter.record_throttle()
+    assert limiter.interval == pytest.approx(2.0)
+    # The next start waits out the pause, not just the old spacing
+    assert limiter.acquire() == pytest.approx(2.0)
+    limiter.record_throttle()
+    assert limiter.interval == pytest.approx(4.0)
+
+
+def test_throttle_from_zero_interval_uses_the_floor_and_respects_the_cap():
+    limiter, _ = make_limiter(initial_interval=0.0, backoff_floor=1.5, max_interval=5.0)
+    limiter.record_throttle()
+    assert limiter.interval == pytest.approx(1.5)
+    for _ in range(5):
+        limiter.record_throttle()
+    assert limiter.interval == pytest.approx(5.0)
+
+
+def test_retry_after_overrides_the_pause():
+    limiter, clock = make_limiter(initial_interval=1.0)
+    limiter.record_throttle(retry_after=30.0)
+    assert limiter.acquire() == pytest.approx(30.0)
+    assert clock.now == pytest.approx(130.0)
+
+
+def test_concurrent_callers_get_distinct_slots():
+    # A frozen clock: every caller asks at the same instant and must get its own slot
+    limiter = AdaptiveRateLimiter(initial_interval=1.0, clock=lambda: 100.0, sleep=lambda seconds: None)
+    waits = []
+    lock = threading.Lock()
+
+    def worker():
+        waited = limiter.acquire()
+        with lock:
+            waits.append(waited)
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(waits) == [pytest.approx(float(n)) for n in range(5)]
+
+
+@pytest.mark.parametrize("status", [403, 429])
+def test_throttle_status_reads_http_errors(status):
+    assert throttle_status(http_error(status)) == status
+
+
+def test_throttle_status_ignores_other_errors():
+    assert throttle_status(http_error(404)) is None
+    assert throttle_status(ValueError("no formats found")) is None
+
+
+def test_throttle_status_unwraps_a_download_error():
+    cause = http_error(429)
+    error = DownloadError("ERROR: unable to download video data", (type(cause), cause, None))
+    assert throttle_status(error) == 429
+
+
+def test_throttle_status_follows_the_cause_chain():
+    try:
+        try:
+            raise http_error(403)
+        except urllib.error.HTTPError as e:
+            raise RuntimeError("extraction failed") from e
+    except RuntimeError as e:
+        assert throttle_status(e) == 403
+
+
+def test_throttle_status_reads_the_message_when_there_is_no_status():
+    assert throttle_status(Exception("ERROR: HTTP Error 429: Too Many Requests")) == 429
+
+
+def test_throttle_status_stops_on_a_cycle():
+    error = Exception("loop")
+    error.__context__ = error
+    assert throttle_status(error) is None
+
+
+class MediaHandler(BaseHTTPRequestHandler):
+    """Serves one small media file, answering the first throttle_first requests with 429"""
+
+    body = b"\x00" * 64 * 1024
+    throttle_first = 1
+    requests = 0
+
+    def do_GET(self):
+        type(self).requests += 1
+        if type(self).requests <= self.throttle_first:
+            self.send_response(429)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class CountingLimiter(AdaptiveRateLimiter):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.throttles = 0
+
+    def record_throttle(self, retry_after: float = None):
+        self.throttles += 1
+        super().record_throttle(retry_after)
+
+
+def test_download_retries_after_a_429_from_a_local_server(tmp_path):
+    pytest.importorskip("yt_dlp")
+    pytest.importorskip("urllib3")
+    from downloader import VideoDownloader
+    from storage import StorageBudget
+    from throughput import ThroughputModel
+
+    MediaHandler.requests = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MediaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        limiter = CountingLimiter(initial_interval=0.0, backoff_floor=0.01)
+        downloader = VideoDownloader(output_folder=str(tmp_path), rate_limiter=limiter,
+                                     throughput=ThroughputModel(str(tmp_path / "throughput.json")))
+        downloader.storage = StorageBudget(str(tmp_path), reserve_bytes=0, free_space=lambda path: 10 ** 12)
+        downloader.total_files = 1
+        url = f"http://127.0.0.1:{server.server_address[1]}/media.mp4"
+
+        job = downloader.download_one(url, 1, for_processing=False)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert job is not None
+    assert limiter.throttles == 1
+    with open(job.file_path, "rb") as f:
+        assert f.read() == MediaHandler.body
@@ -0,0 +1,66 @@
+import os
+import shutil
+import subprocess
+import threading
+import urllib.request
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytestmark = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg on PATH")
+
+DURATION = 12
+SEGMENT_LENGTH = 4
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def media_server(tmp_path):
+    """A local HTTP server with a synthetic MPEG-TS file, keyframes every second so any cut lands on one"""
+    root = tmp_path / "www"
+    root.mkdir()
+    subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", f"testsrc=size=160x120:rate=25:duration={DURATION}",
+                    "-f", "lavfi", "-i", f"sine=frequency=440:duration={DURATION}",
+                    "-c:v", "libx264", "-g", "25", "-c:a", "aac", "-shortest", "-f", "mpegts",
+                    "-y", str(root / "long.ts")], check=True)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=str(root)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/long.ts"
+    server.shutdown()
+    server.server_close()
+
+
+def test_process_stream_splits_a_download_in_flight(tmp_path, media_server):
+    from downloader import VideoDownloader
+    from processor import MediaProcessor
+    from throughput import ThroughputModel
+
+    output = tmp_path / "out"
+    throughput = ThroughputModel(str(tmp_path / "throughput.json"))
+    events = []
+    downloader = VideoDownloader(output_folder=str(output), throughput=throughput)
+    processor = MediaProcessor(lambda message, percent: events.append((message, percent)), str(output),
+                               throughput=throughput)
+    processor.SEGMENT_LENGTH = SEGMENT_LENGTH
+    downloader.STREAM_CHUNK_SIZE = 16 * 1024
+    downloader.total_files = 1
+
+    response = urllib.request.urlopen(media_server)
+    total = int(response.headers["Content-Length"])
+    chunks = downloader._iter_stream(response, total, 1, "long.ts")
+    parts = processor.process_stream(chunks, "long", duration=DURATION)
+
+    assert len(parts) == DURATION // SEGMENT_LENGTH
+    assert [os.path.basename(path) for path in parts] == [f"long_part{n}.mp4" for n in range(1, len(parts) + 1)]
+    for path in parts:
+        assert os.path.dirname(path) in (processor.min45_folder, processor.remainder_folder)
+        assert os.path.getsize(path) > 0
+    # Nothing of the original was stored, and the staging dir is gone
+    assert not os.path.exists(downloader.downloads_folder) or not os.listdir(downloader.downloads_folder)
+    assert not [name for name in os.listdir(output) if name.startswith(".split45_") and name != ".split45_cache"]
+    assert events[-1][1] == 100
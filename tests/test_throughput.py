@@ -0,0 +1,31 @@
+import pytest
+
+from throughput import BatchEstimate, ThroughputModel
+
+
+@pytest.fixture
+def model(tmp_path):
+    return ThroughputModel(str(tmp_path / "throughput.json"))
+
+
+def test_a_copied_mp3_split_does_not_teach_encode_speed(model):
+    before = model.rates['encode_speed']
+    model.record_processing(500_000_000, 9 * 3600, 0.6, audio_only=True, transcoded=False)
+    assert model.rates['encode_speed'] == before
+    model.record_processing(500_000_000, 3600, 60, audio_only=True)
+    assert model.rates['encode_speed'] != before
+
+
+def test_rates_are_saved_and_reloaded(model):
+    model.record_download(100_000_000, 10.0, 600)
+    assert ThroughputModel(model.path).rates == model.rates
+
+
+def test_batch_estimate_matches_estimate_batch(model):
+    items = [(600.0, None), (None, 50_000_000.0), (None, None), (None, None)]
+    for pipeline in (False, True):
+        batch = BatchEstimate(model, pipeline=pipeline)
+        for duration, size in items[:2]:
+            batch.add(duration, size)
+        assert batch.estimate(len(items)) == pytest.approx(model.estimate_batch(items, pipeline=pipeline))
+    assert BatchEstimate(model).estimate(0) == 0.0
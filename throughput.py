@@ -0,0 +1,216 @@
+import os
+import json
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+THROUGHPUT_NAME = "throughput.json"
+
+
+def default_throughput_path() -> str:
+    """Next to settings.json, where the GUI keeps its other state"""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), THROUGHPUT_NAME)
+
+
+class ThroughputModel:
+    """Rates learned from past runs, used to turn known durations and sizes into time estimates.
+
+    Each rate is an exponentially weighted average, so it follows a faster
+    connection or a new machine within a few jobs while one outlier barely
+    moves it. Until something has been measured the defaults below apply.
+    """
+
+    SMOOTHING = 0.3
+    MIN_SAMPLE_SECONDS = 0.5
+    DEFAULTS = {
+        'download_bytes_per_s': 2.5e6,
+        'remux_bytes_per_s': 80e6,
+        'encode_speed': 30.0,  # seconds of media encoded to MP3 per second
+        'video_bytes_per_media_s': 60e3,  # low-quality video, about 480 kbit/s
+        'audio_bytes_per_media_s': 16e3,
+        'media_seconds_per_item': 1800.0,  # duration assumed for a URL not yet extracted
+    }
+
+    def __init__(self, path: str = None):
+        self.path = path if path is not None else default_throughput_path()
+        self._lock = threading.Lock()
+        self.rates: Dict[str, float] = dict(self.DEFAULTS)
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+            for key, value in saved.get('rates', {}).items():
+                if key in self.rates and isinstance(value, (int, float)) and value > 0:
+                    self.rates[key] = float(value)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Could not load throughput model: {e}")
+
+    def _save(self):
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump({'rates': self.rates}, f, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Could not save throughput model: {e}")
+
+    def _update(self, samples: Dict[str, float]):
+        with self._lock:
+            for key, value in samples.items():
+                if value > 0:
+                    self.rates[key] += self.SMOOTHING * (value - self.rates[key])
+            self._save()
+
+    def record_download(self, size: int, seconds: float, duration: float = 0, audio_only: bool = False):
+        if seconds < self.MIN_SAMPLE_SECONDS or size <= 0:
+            return
+        samples = {'download_bytes_per_s': size / seconds}
+        if duration > 0:
+            samples['media_seconds_per_item'] = duration
+            samples['audio_bytes_per_media_s' if audio_only else 'video_bytes_per_media_s'] = size / duration
+        self._update(samples)
+
+    def record_processing(self, size: int, duration: float, seconds: float, audio_only: bool = False,
+                          transcoded: bool = True):
+        """transcoded is False when MP3 parts were copied out of an MP3 input, which says nothing of encode speed"""
+        if seconds < self.MIN_SAMPLE_SECONDS:
+            return
+        if audio_only:
+            if transcoded:
+                self._update({'encode_speed': duration / seconds})
+        elif size > 0:
+            self._update({'remux_bytes_per_s': size / seconds})
+
+    def _fill(self, duration: Optional[float], size: Optional[float], audio_only: bool) -> Tuple[float, float]:
+        bytes_per_s = self.rates['audio_bytes_per_media_s' if audio_only else 'video_bytes_per_media_s']
+        if not duration and size:
+            duration = size / bytes_per_s
+        duration = duration or self.rates['media_seconds_per_item']
+        return duration, size or duration * bytes_per_s
+
+    def download_seconds(self, duration: float = None, size: float = None, audio_only: bool = False) -> float:
+        duration, size = self._fill(duration, size, audio_only)
+        return size / self.rates['download_bytes_per_s']
+
+    def processing_seconds(self, duration: float = None, size: float = None, audio_only: bool = False) -> float:
+        duration, size = self._fill(duration, size, audio_only)
+        if audio_only:
+            return duration / self.rates['encode_speed']
+        return size / self.rates['remux_bytes_per_s']
+
+    def estimate_batch(self, items: List[Tuple[Optional[float], Optional[float]]], audio_only: bool = False,
+                       download: bool = True, pipeline: bool = False) -> float:
+        """Seconds for a batch of (duration, size) items, either of which may be unknown.
+
+        In pipeline mode processing overlaps downloading, so the batch takes as
+        long as the slower stage plus the part of the other that cannot overlap.
+        """
+        batch = BatchEstimate(self, audio_only, download, pipeline)
+        for duration, size in items:
+            batch.add(duration, size)
+        return batch.estimate(len(items))
+
+
+class BatchEstimate:
+    """ThroughputModel.estimate_batch kept as running totals, one item at a time.
+
+    Items not added yet count with the model's defaults, so a batch that
+    grows as playlists are read is re-estimated in constant time per item.
+    """
+
+    def __init__(self, model: ThroughputModel, audio_only: bool = False, download: bool = True,
+                 pipeline: bool = False):
+        self.model = model
+        self.audio_only = audio_only
+        self.download = download
+        self.pipeline = pipeline
+        self.known = 0
+        self.download_total = 0.0
+        self.processing_total = 0.0
+        self.first_download = 0.0
+        self.last_processing = 0.0
+
+    def _seconds(self, duration: Optional[float], size: Optional[float]) -> Tuple[float, float]:
+        download = self.model.download_seconds(duration, size, self.audio_only) if self.download else 0.0
+        return download, self.model.processing_seconds(duration, size, self.audio_only)
+
+    def add(self, duration: Optional[float], size: Optional[float]):
+        download, processing = self._seconds(duration, size)
+        if not self.known:
+            self.first_download = download
+        self.known += 1
+        self.download_total += download
+        self.processing_total += processing
+        self.last_processing = processing
+
+    def estimate(self, count: int) -> float:
+        """Seconds for count items, the ones added so far first"""
+        if count <= 0:
+            return 0.0
+        unknown = max(0, count - self.known)
+        download, processing = self._seconds(None, None)
+        downloads = self.download_total + unknown * download
+        processings = self.processing_total + unknown * processing
+        if self.download and self.pipeline:
+            first = self.first_download if self.known else download
+            last = processing if unknown else self.last_processing
+            return max(downloads + last, first + processings)
+        return downloads + processings
+
+
+def format_eta(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"ETA {hours}h {minutes:02d}m"
+    return f"ETA {minutes}m {seconds:02d}s" if minutes else f"ETA {seconds}s"
+
+
+class WeightedProgress:
+    """Combines per-item progress into one batch percentage weighted by each item's expected work.
+
+    With weights in expected seconds, as ThroughputModel gives them, messages
+    also carry the estimated time left for the whole batch.
+    """
+
+    def __init__(self, weights: List[float], callback: Callable[[str, float], None]):
+        total = sum(weights)
+        self.weights = [w / total for w in weights] if total > 0 else [1.0 / len(weights)] * len(weights)
+        self.expected_seconds = total
+        self.callback = callback
+        self.fractions = [0.0] * len(weights)
+        self._lock = threading.Lock()
+
+    @property
+    def percent(self) -> float:
+        return sum(w * f for w, f in zip(self.weights, self.fractions)) * 100
+
+    def for_item(self, index: int) -> Callable[[str, float], None]:
+        def report(message: str, progress: float):
+            if progress < 0:
+                self.callback(message, progress)
+                return
+            with self._lock:
+                self.fractions[index] = max(self.fractions[index], min(progress, 100) / 100)
+                percent = self.percent
+            remaining = self.expected_seconds * (100 - percent) / 100
+            if remaining >= 1:
+                message = f"{message} - batch {format_eta(remaining)}"
+            self.callback(message, percent)
+        return report
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_throughput_model() -> ThroughputModel:
+    """The process-wide model, shared by every downloader and processor so they learn together"""
+    global _model
+    with _model_lock:
+        if _model is None:
+            _model = ThroughputModel()
+        return _model
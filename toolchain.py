@@ -0,0 +1,161 @@
+import os
+import sys
+import json
+import shutil
+import threading
+import subprocess
+from typing import Dict, Optional, Set
+
+# Windows-specific configuration to hide console windows
+if sys.platform == "win32":
+    startupinfo = subprocess.STARTUPINFO()
+    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    startupinfo.wShowWindow = subprocess.SW_HIDE
+    subprocess_kwargs = {
+        'startupinfo': startupinfo,
+        'creationflags': subprocess.CREATE_NO_WINDOW
+    }
+else:
+    subprocess_kwargs = {}
+
+CACHE_VERSION = 1
+
+
+def find_binary(name: str) -> str:
+    """Find an FFmpeg tool - bundled (PyInstaller or next to the source) or on PATH"""
+    executable = name + ".exe" if sys.platform == "win32" else name
+    search_dirs = []
+    if getattr(sys, 'frozen', False):
+        search_dirs.append(sys._MEIPASS)
+    search_dirs.append(os.path.dirname(os.path.abspath(__file__)))
+
+    for base_path in search_dirs:
+        bundled_path = os.path.join(base_path, 'ffmpeg', executable)
+        if os.path.exists(bundled_path):
+            return bundled_path
+
+    return shutil.which(name) or name
+
+
+def default_cache_path() -> str:
+    base = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME') or \
+        os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "Split45", "toolchain.json")
+
+
+def _parse_listing(output: str) -> Set[str]:
+    """Names from 'ffmpeg -encoders' / '-muxers' tables: a flags column, then the name"""
+    names = set()
+    in_table = False
+    for line in output.splitlines():
+        if line.strip().startswith('--'):
+            in_table = True
+            continue
+        fields = line.split()
+        if in_table and len(fields) >= 2:
+            names.update(fields[1].split(','))
+    return names
+
+
+class Toolchain:
+    """Resolved ffmpeg/ffprobe binaries and what the ffmpeg build can do.
+
+    Capabilities are detected once and cached on disk keyed by the binary's
+    path and mtime, so a new FFmpeg install is picked up automatically. When
+    detection is impossible every capability is assumed present, which keeps
+    the old behaviour of simply trying the command.
+    """
+
+    def __init__(self, ffmpeg_path: str = None, ffprobe_path: str = None, cache_path: str = None):
+        self.ffmpeg_path = ffmpeg_path or find_binary('ffmpeg')
+        self.ffprobe_path = ffprobe_path or find_binary('ffprobe')
+        self.cache_path = cache_path if cache_path is not None else default_cache_path()
+        self._capabilities = None
+        self._lock = threading.Lock()
+
+    def _binary_key(self) -> Optional[str]:
+        try:
+            return f"{os.path.abspath(self.ffmpeg_path)}|{os.stat(self.ffmpeg_path).st_mtime_ns}"
+        except OSError:
+            return None
+
+    def _load_cached(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self.cache_path, 'r') as f:
+                cached = json.load(f)
+            if cached.get('version') == CACHE_VERSION and cached.get('key') == key:
+                return cached['capabilities']
+        except (OSError, ValueError, KeyError):
+            pass
+        return None
+
+    def _save_cached(self, key: str, capabilities: Dict):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(self.cache_path, 'w') as f:
+                json.dump({'version': CACHE_VERSION, 'key': key, 'capabilities': capabilities}, f)
+        except OSError as e:
+            print(f"Could not save toolchain cache: {e}")
+
+    def _run(self, *args: str) -> Optional[str]:
+        try:
+            result = subprocess.run([self.ffmpeg_path, '-hide_banner', *args], capture_output=True, text=True,
+                                    timeout=30, **subprocess_kwargs)
+            return result.stdout if result.returncode == 0 else None
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    def _detect(self) -> Dict:
+        encoders = self._run('-encoders')
+        muxers = self._run('-muxers')
+        options = self._run('-h', 'long')
+        version = self._run('-version')
+        return {
+            'encoders': sorted(_parse_listing(encoders)) if encoders is not None else None,
+            'muxers': sorted(_parse_listing(muxers)) if muxers is not None else None,
+            'progress': ('-progress' in options) if options is not None else None,
+            'version': version.splitlines()[0] if version else None,
+        }
+
+    @property
+    def capabilities(self) -> Dict:
+        with self._lock:
+            if self._capabilities is None:
+                key = self._binary_key()
+                capabilities = self._load_cached(key) if key and self.cache_path else None
+                if capabilities is None:
+                    capabilities = self._detect()
+                    if key and self.cache_path and capabilities['version']:
+                        self._save_cached(key, capabilities)
+                self._capabilities = capabilities
+            return self._capabilities
+
+    def has_encoder(self, name: str) -> bool:
+        encoders = self.capabilities['encoders']
+        return encoders is None or name in encoders
+
+    def has_muxer(self, name: str) -> bool:
+        muxers = self.capabilities['muxers']
+        return muxers is None or name in muxers
+
+    @property
+    def supports_progress(self) -> bool:
+        return self.capabilities['progress'] is not False
+
+    @property
+    def mp3_encoder(self) -> str:
+        encoders = self.capabilities['encoders']
+        return 'libmp3lame' if encoders and 'libmp3lame' in encoders else 'mp3'
+
+
+_toolchain = None
+_toolchain_lock = threading.Lock()
+
+
+def get_toolchain() -> Toolchain:
+    """The process-wide toolchain; binaries are resolved once however often processors are rebuilt"""
+    global _toolchain
+    with _toolchain_lock:
+        if _toolchain is None:
+            _toolchain = Toolchain()
+        return _toolchain
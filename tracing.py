@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import atexit
+import functools
+import threading
+from typing import Callable, Dict, List, Optional
+
+TRACE_ENV = "SPLIT45_TRACE"
+
+
+class Span:
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer: 'Tracer', name: str, args: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0.0
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def __enter__(self) -> 'Span':
+        self.tracer._stack().append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer.complete(self.name, self.start, end, **self.args)
+        return False
+
+
+class _NullSpan:
+    """What span() returns while tracing is off: entering, leaving and set() do nothing"""
+    __slots__ = ()
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Collects timed spans per thread and writes them as a Chrome trace-event file.
+
+    Spans become complete ('X') events, which chrome://tracing and Perfetto
+    nest by time within each thread, so a part cut shows up inside the
+    process_video call that made it.
+    """
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.events: List[Dict] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._named_threads = set()
+        self._epoch = time.perf_counter()
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name: str, args: Dict = None) -> Span:
+        return Span(self, name, args or {})
+
+    def current(self) -> Optional[Span]:
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def complete(self, name: str, start: float, end: float, **args):
+        """Record a finished span from perf_counter() timestamps"""
+        thread = threading.current_thread()
+        event = {
+            'name': name, 'cat': 'split45', 'ph': 'X', 'pid': self.pid, 'tid': thread.ident,
+            'ts': (start - self._epoch) * 1e6, 'dur': max(0.0, end - start) * 1e6,
+        }
+        if args:
+            event['args'] = args
+        with self._lock:
+            if thread.ident not in self._named_threads:
+                self._named_threads.add(thread.ident)
+                self.events.append({'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': thread.ident,
+                                    'args': {'name': thread.name}})
+            self.events.append(event)
+
+    def counter(self, name: str, **values):
+        """Record a counter ('C') event, drawn as a stacked graph such as queue depth over time"""
+        event = {'name': name, 'cat': 'split45', 'ph': 'C', 'pid': self.pid,
+                 'ts': (time.perf_counter() - self._epoch) * 1e6, 'args': values}
+        with self._lock:
+            self.events.append(event)
+
+    def write(self, path: str):
+        with self._lock:
+            events = list(self.events)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, default=str)
+        print(f"Wrote trace with {len(events)} events to {path} (open in https://ui.perfetto.dev)")
+
+
+_tracer: Optional[Tracer] = None
+
+
+def enable() -> Tracer:
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+
+def disable() -> Optional[Tracer]:
+    """Stop tracing, returning the tracer so its spans can still be written"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def enable_from_env():
+    """Trace the whole run into the file named by SPLIT45_TRACE, written at exit"""
+    path = os.environ.get(TRACE_ENV)
+    if path and not enabled():
+        tracer = enable()
+        atexit.register(tracer.write, path)
+
+
+def now() -> float:
+    return time.perf_counter()
+
+
+def span(name: str, **args):
+    tracer = _tracer
+    if tracer is None:
+        return NULL_SPAN
+    return tracer.span(name, args)
+
+
+def annotate(**args):
+    """Attach values (byte counts, paths, cache hits) to the innermost open span of this thread"""
+    tracer = _tracer
+    if tracer is None:
+        return
+    current = tracer.current()
+    if current is not None:
+        current.args.update(args)
+
+
+def complete(name: str, start: float, end: float, **args):
+    tracer = _tracer
+    if tracer is not None:
+        tracer.complete(name, start, end, **args)
+
+
+def counter(name: str, **values):
+    tracer = _tracer
+    if tracer is not None:
+        tracer.counter(name, **values)
+
+
+def traced(name: str = None) -> Callable:
+    """Decorator wrapping every call in a span; costs one global lookup while tracing is off"""
+    def decorate(func: Callable) -> Callable:
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return func(*args, **kwargs)
+            with tracer.span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate